@@ -0,0 +1,59 @@
+"""
+Membandingkan hasil pencarian kandidat SEARCH_MODE=db (ts_rank) dengan scorer Python.
+
+  python cek_paritas_search.py --sampel 50
+  python cek_paritas_search.py --proyek "aplikasi kuliner berbasis data" --proyek "kelas fotografi online"
+
+Untuk setiap kueri dilaporkan irisan top-k kedua mode. Urutan bisa berbeda karena ts_rank
+memberi bobot frekuensi, sedangkan scorer Python menghitung kata kunci yang muncul.
+"""
+import argparse
+import asyncio
+import random
+
+import asyncpg
+
+import main as app
+
+
+def _laporan(label, nama_python, nama_db):
+    irisan = set(nama_python) & set(nama_db)
+    k = max(len(nama_python), 1)
+    print(f"{label}: irisan {len(irisan)}/{len(nama_python)} (db mengembalikan {len(nama_db)})")
+    return len(irisan) / k
+
+
+async def main(args):
+    skor = []
+    conn = await asyncpg.connect(app.SUPABASE_DB_URL, statement_cache_size=0)
+    try:
+        rows = await conn.fetch("SELECT alumni_id, dokumen FROM alumni_search WHERE dokumen <> ''")
+    finally:
+        await conn.close()
+
+    sampel = random.Random(args.seed).sample(list(rows), min(args.sampel, len(rows)))
+    for row in sampel:
+        # dokumen sama dengan teks profil lengkap yang dibangun ambil_profil_alumni (huruf kecil)
+        hasil_python = await app.cari_top_alumni_kolaborasi(row["alumni_id"], row["dokumen"], mode="python")
+        hasil_db = await app.cari_top_alumni_kolaborasi(row["alumni_id"], row["dokumen"], mode="db")
+        skor.append(_laporan(f"kolaborasi alumni {row['alumni_id']}",
+                             [a["nama_alumni_kolaborasi"] for a in hasil_python],
+                             [a["nama_alumni_kolaborasi"] for a in hasil_db]))
+
+    for teks in args.proyek:
+        hasil_python = await app.cari_alumni_untuk_proyek(teks, mode="python")
+        hasil_db = await app.cari_alumni_untuk_proyek(teks, mode="db")
+        skor.append(_laporan(f"proyek {teks!r}",
+                             [a["nama_lengkap"] for a in hasil_python],
+                             [a["nama_lengkap"] for a in hasil_db]))
+
+    if skor:
+        print(f"\nRata-rata irisan top-k: {sum(skor) / len(skor):.2%} dari {len(skor)} kueri")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cek paritas pencarian kandidat db vs python")
+    parser.add_argument("--sampel", type=int, default=20, help="jumlah alumni acak sebagai kueri kolaborasi")
+    parser.add_argument("--proyek", action="append", default=[], help="teks ide proyek (boleh berulang)")
+    parser.add_argument("--seed", type=int, default=1)
+    asyncio.run(main(parser.parse_args()))
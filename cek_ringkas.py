@@ -0,0 +1,48 @@
+"""
+Membandingkan token output GENERATION_MODE=ringkas dengan mode bebas (single) pada input yang sama.
+
+  python cek_ringkas.py --sampel 10
+  python cek_ringkas.py --sampel 5 --proyek "aplikasi kuliner berbasis data" --language en
+
+Token output diambil dari usageMetadata.candidatesTokenCount; ringkasan akhir sama dengan
+GET /admin/generasi.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import main as app
+
+
+async def _bandingkan(label, generate):
+    durasi = {}
+    for mode in ("single", "ringkas"):
+        mulai = time.perf_counter()
+        await generate(mode)
+        durasi[mode] = (time.perf_counter() - mulai) * 1000
+    print(f"{label}: single {durasi['single']:.0f} ms, ringkas {durasi['ringkas']:.0f} ms")
+
+
+async def main(args):
+    semua_nama = await app.ambil_semua_nama_alumni()
+    for nama in random.Random(args.seed).sample(semua_nama, min(args.sampel, len(semua_nama))):
+        data = await app.ambil_profil_alumni(nama)
+        await _bandingkan(f"rekomendasi {nama!r}", lambda mode: app.generate_rekomendasi(data, args.language, mode=mode))
+
+    for teks in args.proyek:
+        alumni = await app.cari_alumni_untuk_proyek(teks)
+        input = app.ProyekInput(ide_proyek=teks, language=args.language)
+        await _bandingkan(f"proyek {teks!r}", lambda mode: app.generate_proyek(input, alumni, args.language, mode=mode))
+
+    print(json.dumps(app.ringkasan_generasi(), indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bandingkan token output mode ringkas vs single")
+    parser.add_argument("--sampel", type=int, default=5, help="jumlah alumni acak untuk /rekomendasi")
+    parser.add_argument("--proyek", action="append", default=[], help="teks ide proyek (boleh berulang)")
+    parser.add_argument("--language", default="id")
+    parser.add_argument("--seed", type=int, default=1)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,61 @@
+"""
+Koneksi database bersama.
+
+Jika pool sudah dibuat (saat warm-up), koneksi diambil dari pool; jika belum, fallback ke
+koneksi baru per pemakaian seperti sebelumnya.
+"""
+import asyncio
+import os
+
+import asyncpg
+from dotenv import load_dotenv
+
+load_dotenv()
+SUPABASE_DB_URL = os.getenv("SUPABASE_DB_URL")
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", "2"))
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", "10"))
+# 0 untuk pgbouncer mode transaction (Supabase pooler); isi > 0 jika terhubung langsung ke Postgres
+# agar query panas yang dijalankan saat warm-up tersimpan sebagai prepared statement
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "0"))
+# Satu request bisa memegang dua koneksi sekaligus (profil + kolaborator); jika pool penuh lebih
+# lama dari ini, pakai koneksi baru agar request yang saling menunggu tidak deadlock
+DB_POOL_ACQUIRE_TIMEOUT = float(os.getenv("DB_POOL_ACQUIRE_TIMEOUT", "2"))
+
+_pool = None
+
+
+async def buat_pool():
+    global _pool
+    if _pool is None:
+        _pool = await asyncpg.create_pool(SUPABASE_DB_URL, min_size=DB_POOL_MIN, max_size=DB_POOL_MAX,
+                                          statement_cache_size=DB_STATEMENT_CACHE_SIZE)
+    return _pool
+
+
+async def tutup_pool():
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
+
+
+def pool():
+    return _pool
+
+
+async def buka_koneksi():
+    if _pool is not None:
+        try:
+            return await _pool.acquire(timeout=DB_POOL_ACQUIRE_TIMEOUT)
+        except asyncio.TimeoutError:
+            pass
+    # Menambahkan statement_cache_size=0 untuk mengatasi error prepared statement
+    return await asyncpg.connect(SUPABASE_DB_URL, statement_cache_size=0)
+
+
+async def tutup_koneksi(conn):
+    # Koneksi dari pool dikembalikan ke pool, bukan ditutup
+    if _pool is not None and isinstance(conn, asyncpg.pool.PoolConnectionProxy):
+        await _pool.release(conn)
+    else:
+        await conn.close()
@@ -0,0 +1,73 @@
+"""
+Batas waktu end-to-end per request.
+
+Deadline diambil dari header X-Request-Deadline-Ms (sisa waktu yang masih ditunggu klien)
+atau REQUEST_DEADLINE_MS. Tahap opsional hanya dijalankan selama sisa waktunya masih
+menyisakan cadangan untuk panggilan LLM; tahap yang dilewati atau dipangkas dicatat di
+`degradasi` dan dikembalikan ke klien.
+"""
+import asyncio
+import os
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+REQUEST_DEADLINE_MS = int(os.getenv("REQUEST_DEADLINE_MS", "60000"))
+# Batas atas deadline dari header agar klien tidak bisa meminta lebih dari timeout LLM + DB
+REQUEST_DEADLINE_MAX_MS = int(os.getenv("REQUEST_DEADLINE_MAX_MS", "120000"))
+# Waktu minimum yang disisakan untuk Gemini sebelum tahap opsional boleh berjalan
+DEADLINE_CADANGAN_LLM_DETIK = float(os.getenv("DEADLINE_CADANGAN_LLM_DETIK", "15"))
+# Perkiraan kecepatan output Gemini, dipakai untuk memangkas maxOutputTokens saat waktu mepet
+DEADLINE_TOKEN_PER_DETIK = float(os.getenv("DEADLINE_TOKEN_PER_DETIK", "100"))
+
+
+class Deadline:
+    def __init__(self, budget_detik: float):
+        self.batas = time.monotonic() + budget_detik
+        self.degradasi = []
+
+    @classmethod
+    def dari_request(cls, request):
+        nilai = request.headers.get("x-request-deadline-ms") if request is not None else None
+        try:
+            budget_ms = int(nilai) if nilai else REQUEST_DEADLINE_MS
+        except ValueError:
+            budget_ms = REQUEST_DEADLINE_MS
+        return cls(min(max(budget_ms, 0), REQUEST_DEADLINE_MAX_MS) / 1000.0)
+
+    def sisa(self) -> float:
+        return max(0.0, self.batas - time.monotonic())
+
+    def sisa_opsional(self) -> float:
+        """Waktu yang boleh dipakai tahap opsional tanpa memakan cadangan LLM."""
+        return self.sisa() - DEADLINE_CADANGAN_LLM_DETIK
+
+    def catat(self, bagian: str):
+        if bagian not in self.degradasi:
+            self.degradasi.append(bagian)
+
+    async def opsional(self, bagian: str, coro, default):
+        """
+        Menjalankan tahap opsional dalam sisa waktunya. Jika waktu tidak cukup atau habis,
+        tahap dilewati, `default` dikembalikan dan bagian dicatat sebagai terdegradasi.
+        """
+        waktu = self.sisa_opsional()
+        if waktu <= 0:
+            coro.close()
+            self.catat(bagian)
+            return default
+        try:
+            return await asyncio.wait_for(coro, timeout=waktu)
+        except asyncio.TimeoutError:
+            self.catat(bagian)
+            return default
+
+    def max_output_tokens(self, bawaan: int) -> int:
+        """
+        Memangkas jumlah token output agar generasi bisa selesai sebelum deadline.
+        """
+        muat = int(self.sisa() * DEADLINE_TOKEN_PER_DETIK)
+        if muat < bawaan:
+            self.catat("token_output")
+            return max(muat, 1)
+        return bawaan
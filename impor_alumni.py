@@ -0,0 +1,249 @@
+"""
+Impor massal alumni ke alumni_db dan tabel detail aktivitas memakai COPY dalam satu transaksi.
+
+Format JSONL, satu alumni per baris:
+  {"id": 12, "nama_lengkap": "...", "nama_panggilan": "...", "aktivitas": "bekerja, bisnis / freelance",
+   "skill_gabungan": "...", "pekerja": {"skill": "...", ...}, "bisnis": {...}, "rumah_tangga": {...}}
+
+Format CSV memakai kolom datar dengan prefiks tabel detail, misalnya pekerja_skill,
+bisnis_nama_usaha, rumah_tangga_bidang_minat. Detail dianggap ada jika salah satu kolomnya terisi.
+
+  python impor_alumni.py data.jsonl
+  python impor_alumni.py data.csv --perbaiki
+"""
+import argparse
+import asyncio
+import csv
+import json
+import os
+import time
+
+import asyncpg
+from dotenv import load_dotenv
+
+load_dotenv()
+SUPABASE_DB_URL = os.getenv("SUPABASE_DB_URL")
+# Jumlah record per COPY; membatasi memori tanpa mengorbankan throughput
+IMPOR_BATCH = int(os.getenv("IMPOR_BATCH", "5000"))
+
+KOLOM_ALUMNI = ["id", "nama_lengkap", "nama_panggilan", "aktivitas", "skill_gabungan"]
+# nama di record -> (tabel, aktivitas terkait, kolom)
+DETAIL = {
+    "pekerja": ("alumni_pekerja", "bekerja", ["skill", "deskripsi_skill", "sertifikasi", "dukungan"]),
+    "bisnis": ("alumni_bisnis", "bisnis / freelance", ["nama_usaha", "bidang_usaha", "dukungan", "kolaborasi", "butuh_sdm", "skill_praktikal"]),
+    "rumah_tangga": ("alumni_rumah_tangga", "ibu rumah tangga", ["bidang_minat", "spesifik_bidang", "pengalaman_kelas", "perlu_grup"]),
+}
+AKTIVITAS_VALID = [aktivitas for _, aktivitas, _ in DETAIL.values()]
+MAKS_ERROR = 50
+
+
+class ImporGagal(Exception):
+    def __init__(self, errors):
+        super().__init__(f"{len(errors)} record tidak valid")
+        self.errors = errors
+
+
+def baca_jsonl(f):
+    for nomor, baris in enumerate(f, start=1):
+        baris = baris.strip()
+        if not baris:
+            continue
+        try:
+            record = json.loads(baris)
+        except json.JSONDecodeError:
+            record = None
+        # Record rusak diteruskan sebagai dict kosong agar dilaporkan oleh validasi
+        yield nomor, record if isinstance(record, dict) else {}
+
+
+def baca_csv(f):
+    for nomor, row in enumerate(csv.DictReader(f), start=2): # baris 1 adalah header
+        record = {k: (row.get(k) or None) for k in KOLOM_ALUMNI}
+        for nama, (_, _, kolom) in DETAIL.items():
+            detail = {k: (row.get(f"{nama}_{k}") or None) for k in kolom}
+            record[nama] = detail if any(detail.values()) else None
+        yield nomor, record
+
+
+def _teks(nilai):
+    # JSONL bisa berisi angka/bool; kolom tujuan semuanya teks. Objek/list dibiarkan agar ditolak validasi
+    return nilai if nilai is None or isinstance(nilai, (dict, list)) else str(nilai)
+
+
+def normalisasi(record):
+    """Menyeragamkan nilai record menjadi teks sekali di awal, dipakai untuk validasi, COPY, dan indeks."""
+    hasil = {k: (v if k == "id" or k in DETAIL else _teks(v)) for k, v in record.items()}
+    for nama in DETAIL:
+        if isinstance(hasil.get(nama), dict):
+            hasil[nama] = {k: _teks(v) for k, v in hasil[nama].items()}
+    return hasil
+
+
+def validasi(nomor, record, perbaiki: bool, id_terlihat: set):
+    """
+    Mengembalikan list pesan error (kosong jika valid). Dengan perbaiki=True, aktivitas disusun
+    ulang dari detail yang ada dan skill_gabungan kosong diisi dari skill di detail.
+    """
+    errors = []
+    try:
+        record["id"] = int(record.get("id"))
+    except (TypeError, ValueError):
+        return [f"baris {nomor}: id wajib berupa angka"]
+    if record["id"] in id_terlihat:
+        return [f"baris {nomor}: id {record['id']} duplikat di dalam file"]
+    id_terlihat.add(record["id"])
+    for k in KOLOM_ALUMNI[1:]:
+        if record.get(k) is not None and not isinstance(record[k], str):
+            return [f"baris {nomor}: {k} harus berupa teks"]
+    if not (record.get("nama_lengkap") or "").strip():
+        errors.append(f"baris {nomor}: nama_lengkap wajib diisi")
+
+    for nama in DETAIL:
+        if record.get(nama) is not None and not isinstance(record[nama], dict):
+            return [f"baris {nomor}: {nama} harus berupa objek"]
+        for k in DETAIL[nama][2]:
+            if record.get(nama) and record[nama].get(k) is not None and not isinstance(record[nama][k], str):
+                return [f"baris {nomor}: {nama}.{k} harus berupa teks"]
+
+    ada_detail = [aktivitas for nama, (_, aktivitas, _) in DETAIL.items() if record.get(nama)]
+    if perbaiki:
+        record["aktivitas"] = ", ".join(a for a in AKTIVITAS_VALID if a in ada_detail)
+        if not (record.get("skill_gabungan") or "").strip():
+            skill_detail = [(record.get("pekerja") or {}).get("skill"), (record.get("bisnis") or {}).get("skill_praktikal")]
+            record["skill_gabungan"] = ", ".join(filter(None, skill_detail))
+        return errors
+
+    aktivitas = [a.strip() for a in (record.get("aktivitas") or "").split(',') if a.strip()]
+    for a in aktivitas:
+        if a not in AKTIVITAS_VALID:
+            errors.append(f"baris {nomor}: aktivitas '{a}' tidak dikenal")
+        elif a not in ada_detail:
+            errors.append(f"baris {nomor}: aktivitas '{a}' tidak punya detail")
+    for a in ada_detail:
+        if a not in aktivitas:
+            errors.append(f"baris {nomor}: ada detail untuk '{a}' tetapi tidak tercantum di aktivitas")
+    return errors
+
+
+
+
+async def _copy_batch(conn, batch):
+    await conn.copy_records_to_table("stg_alumni", records=[(r["id"], *(r.get(k) for k in KOLOM_ALUMNI[1:])) for r in batch], columns=KOLOM_ALUMNI)
+    for nama, (tabel, _, kolom) in DETAIL.items():
+        rows = [(r["id"], *(r[nama].get(k) for k in kolom)) for r in batch if r.get(nama)]
+        if rows:
+            await conn.copy_records_to_table(f"stg_{tabel}", records=rows, columns=["alumni_id"] + kolom)
+
+
+async def impor(conn, f, format: str, perbaiki: bool = False, kumpulkan_indeks: bool = False):
+    """
+    Membaca file teks `f` per batch, memvalidasi, dan memuatnya dengan COPY ke tabel staging,
+    lalu upsert ke tabel utama dalam satu transaksi. Jika ada record tidak valid, seluruh
+    impor dibatalkan dan ImporGagal dilempar.
+
+    Mengembalikan (statistik, data indeks). Jika kumpulkan_indeks=True, data indeks berisi baris
+    alumni dan detail yang diimpor untuk indeks_profil.terapkan_pembaruan; jika tidak, None
+    sehingga memori tetap sebatas satu batch.
+    """
+    mulai = time.perf_counter()
+    pembaca = baca_jsonl(f) if format == "jsonl" else baca_csv(f)
+    errors, id_terlihat = [], set()
+    jumlah = {"alumni": 0, **{nama: 0 for nama in DETAIL}}
+    indeks_alumni, indeks_detail = [], {nama: [] for nama in DETAIL}
+
+    async with conn.transaction():
+        # Staging dengan kolom eksplisit (bukan LIKE) agar kolom NOT NULL lain di tabel utama tidak ikut
+        await conn.execute("CREATE TEMP TABLE stg_alumni (id INTEGER, nama_lengkap TEXT, nama_panggilan TEXT, aktivitas TEXT, skill_gabungan TEXT) ON COMMIT DROP")
+        for tabel, _, kolom in DETAIL.values():
+            daftar_kolom = ", ".join(f"{k} TEXT" for k in kolom)
+            await conn.execute(f"CREATE TEMP TABLE stg_{tabel} (alumni_id INTEGER, {daftar_kolom}) ON COMMIT DROP")
+
+        def baca_batch():
+            # Parsing, normalisasi, dan validasi bersifat blocking; dijalankan di thread per batch
+            # agar impor besar tidak menahan event loop. Mengembalikan (batch, file habis).
+            batch = []
+            for nomor, record in pembaca:
+                record = normalisasi(record)
+                errors.extend(validasi(nomor, record, perbaiki, id_terlihat))
+                if len(errors) >= MAKS_ERROR:
+                    return batch, True
+                if errors:
+                    continue # Tetap validasi sisa file untuk laporan, tanpa memuat apa pun
+                batch.append(record)
+                jumlah["alumni"] += 1
+                for nama, (_, _, kolom) in DETAIL.items():
+                    if record.get(nama):
+                        jumlah[nama] += 1
+                        if kumpulkan_indeks:
+                            indeks_detail[nama].append({"alumni_id": record["id"], **{k: record[nama].get(k) for k in kolom}})
+                if kumpulkan_indeks:
+                    indeks_alumni.append({k: record.get(k) for k in KOLOM_ALUMNI})
+                if len(batch) >= IMPOR_BATCH:
+                    return batch, False
+            return batch, True
+
+        habis = False
+        while not habis:
+            batch, habis = await asyncio.to_thread(baca_batch)
+            if batch and not errors:
+                await _copy_batch(conn, batch)
+        if errors:
+            raise ImporGagal(errors) # Keluar dari blok transaksi -> rollback
+
+        # Trigger alumni_search (migrasi 001) per baris terlalu lambat untuk impor massal:
+        # nonaktifkan selama impor lalu segarkan dokumen pencarian sekaligus
+        ada_search = await conn.fetchval("SELECT to_regclass('alumni_search') IS NOT NULL")
+        tabel_semua = ["alumni_db"] + [tabel for tabel, _, _ in DETAIL.values()]
+        if ada_search:
+            for tabel in tabel_semua:
+                await conn.execute(f"ALTER TABLE {tabel} DISABLE TRIGGER alumni_search_sync")
+
+        await conn.execute("""
+            INSERT INTO alumni_db (id, nama_lengkap, nama_panggilan, aktivitas, skill_gabungan)
+            SELECT id, nama_lengkap, nama_panggilan, aktivitas, skill_gabungan FROM stg_alumni
+            ON CONFLICT (id) DO UPDATE SET nama_lengkap = EXCLUDED.nama_lengkap, nama_panggilan = EXCLUDED.nama_panggilan,
+                aktivitas = EXCLUDED.aktivitas, skill_gabungan = EXCLUDED.skill_gabungan
+        """)
+        for tabel, _, kolom in DETAIL.values():
+            # Detail alumni yang diimpor diganti seluruhnya agar konsisten dengan kolom aktivitas
+            await conn.execute(f"DELETE FROM {tabel} WHERE alumni_id IN (SELECT id FROM stg_alumni)")
+            daftar_kolom = ", ".join(["alumni_id"] + kolom)
+            await conn.execute(f"INSERT INTO {tabel} ({daftar_kolom}) SELECT {daftar_kolom} FROM stg_{tabel}")
+        await conn.execute("SELECT setval(pg_get_serial_sequence('alumni_db', 'id'), (SELECT max(id) FROM alumni_db))")
+
+        if ada_search:
+            for tabel in tabel_semua:
+                await conn.execute(f"ALTER TABLE {tabel} ENABLE TRIGGER alumni_search_sync")
+            await conn.execute("""
+                INSERT INTO alumni_search (alumni_id, dokumen)
+                SELECT id, coalesce(alumni_search_dokumen(id), '') FROM stg_alumni
+                ON CONFLICT (alumni_id) DO UPDATE SET dokumen = EXCLUDED.dokumen
+            """)
+
+    statistik = {**jumlah, "durasi_s": round(time.perf_counter() - mulai, 3)}
+    if not kumpulkan_indeks:
+        return statistik, None
+    return statistik, (indeks_alumni, indeks_detail["pekerja"], indeks_detail["rumah_tangga"], indeks_detail["bisnis"])
+
+
+async def main(args):
+    format = args.format or ("csv" if args.file.endswith(".csv") else "jsonl")
+    conn = await asyncpg.connect(args.dsn, statement_cache_size=0)
+    try:
+        with open(args.file, encoding="utf-8", newline="") as f:
+            statistik, _ = await impor(conn, f, format, args.perbaiki)
+        print(json.dumps(statistik))
+    except ImporGagal as e:
+        print("\n".join(e.errors))
+        raise SystemExit(1)
+    finally:
+        await conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Impor massal alumni (CSV/JSONL)")
+    parser.add_argument("file")
+    parser.add_argument("--format", choices=["csv", "jsonl"])
+    parser.add_argument("--perbaiki", action="store_true", help="susun ulang aktivitas dari detail yang ada")
+    parser.add_argument("--dsn", default=SUPABASE_DB_URL)
+    asyncio.run(main(parser.parse_args()))
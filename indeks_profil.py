@@ -0,0 +1,222 @@
+"""
+Indeks profil alumni in-memory untuk SEARCH_MODE=indeks.
+
+Seluruh alumni, detail aktivitas, dan baris peluang dimuat dengan empat query massal (tanpa
+query per alumni), lalu disimpan sebagai teks profil siap skor. Setelah PROFILE_INDEX_TTL detik
+indeks dimuat ulang di background; indeks lama tetap disajikan sampai yang baru siap. Jika
+versi data (alumni_versi, migrasi 002) atau isi indeks tidak berubah, indeks lama dipakai terus.
+"""
+import asyncio
+import hashlib
+import itertools
+import json
+import logging
+import os
+import time
+
+from dotenv import load_dotenv
+
+import db
+import skoring
+import versi_data
+
+load_dotenv()
+PROFILE_INDEX_TTL = float(os.getenv("PROFILE_INDEX_TTL", "300"))
+
+logger = logging.getLogger("alumni_ai.indeks_profil")
+
+_penghitung_versi = itertools.count(1)
+
+# Kolom peluang sama dengan SELECT di ambil_profil_alumni karena dict ini masuk ke prompt apa adanya
+KOLOM_PELUANG = {
+    "bisnis": ("nama_usaha", "dukungan", "kolaborasi", "butuh_sdm"),
+    "pekerja": ("skill", "deskripsi_skill", "sertifikasi", "dukungan"),
+    "irt": ("bidang_minat", "spesifik_bidang", "pengalaman_kelas", "perlu_grup"),
+}
+
+
+class IndeksProfil:
+    def __init__(self, alumni_rows, pekerja_rows, irt_rows, bisnis_rows):
+        # Sama seperti fetchrow di implementasi awal: hanya baris detail pertama per alumni yang dipakai
+        pekerja_map, irt_map, bisnis_map = {}, {}, {}
+        for r in pekerja_rows:
+            pekerja_map.setdefault(r["alumni_id"], r)
+        for r in irt_rows:
+            irt_map.setdefault(r["alumni_id"], r)
+        for r in bisnis_rows:
+            bisnis_map.setdefault(r["alumni_id"], r)
+
+        self.alumni = {}
+        self.kandidat = [] # list (id, teks profil) sesuai urutan scan, dikirim ke worker skoring
+        for r in alumni_rows:
+            detail = [pekerja_map.get(r["id"]), irt_map.get(r["id"]), bisnis_map.get(r["id"])]
+            teks = skoring.susun_teks_profil(r["skill_gabungan"], r["aktivitas"], *detail)
+            self.alumni[r["id"]] = {
+                "id": r["id"],
+                "nama_lengkap": r["nama_lengkap"],
+                "nama_panggilan": r["nama_panggilan"],
+                "aktivitas": r["aktivitas"],
+                "skill_gabungan": r["skill_gabungan"] or "",
+                "teks": teks,
+                # Versi profil: berubah jika data alumni atau salah satu detail aktivitasnya berubah
+                "versi": _hash([r["nama_lengkap"], r["nama_panggilan"], r["aktivitas"], r["skill_gabungan"],
+                                *[dict(d) if d else None for d in detail]]),
+            }
+            self.kandidat.append((r["id"], teks))
+
+        self.peluang = {
+            "bisnis": [_baris_peluang("bisnis", r) for r in bisnis_rows],
+            "pekerja": [_baris_peluang("pekerja", r) for r in pekerja_rows],
+            "irt": [_baris_peluang("irt", r) for r in irt_rows],
+        }
+        # alumni_id pemilik tiap baris peluang, agar baris bisa diganti saat pembaruan inkremental
+        self.peluang_pemilik = {
+            "bisnis": [r["alumni_id"] for r in bisnis_rows],
+            "pekerja": [r["alumni_id"] for r in pekerja_rows],
+            "irt": [r["alumni_id"] for r in irt_rows],
+        }
+        self.versi = next(_penghitung_versi)
+        self.dimuat = time.monotonic()
+        self.versi_db = None # nilai alumni_versi saat dimuat (None jika tidak diketahui)
+        self.patch = None # perubahan dari indeks sebelumnya untuk worker skoring (hanya hasil diperbarui)
+        self._versi_data = None
+
+    def alumni_pada(self, posisi: int):
+        return self.alumni[self.kandidat[posisi][0]]
+
+    def versi_data(self) -> str:
+        """
+        Versi seluruh data peluang dan profil kandidat (yang menentukan daftar kolaborator dan
+        alumni proyek). Dihitung sekali per indeks; sama untuk indeks yang dimuat ulang tanpa
+        perubahan data.
+        """
+        if self._versi_data is None:
+            self._versi_data = _hash([[self.alumni[i]["versi"] for i, _ in self.kandidat], self.peluang])
+        return self._versi_data
+
+    def diperbarui(self, alumni_rows, pekerja_rows, irt_rows, bisnis_rows) -> "IndeksProfil":
+        """
+        Indeks baru yang berisi indeks ini ditambah/ditimpa alumni yang diberikan, tanpa memuat
+        ulang dari database. Detail dan peluang milik alumni tersebut diganti seluruhnya.
+        Indeks lama tidak diubah sehingga request yang sedang berjalan tetap konsisten.
+        """
+        baru = IndeksProfil(alumni_rows, pekerja_rows, irt_rows, bisnis_rows)
+        diganti = set(baru.alumni)
+
+        gabungan = object.__new__(IndeksProfil)
+        gabungan.alumni = {**self.alumni, **baru.alumni}
+        # Posisi alumni lama dipertahankan, alumni baru ditambahkan di akhir
+        gabungan.kandidat = [(i, gabungan.alumni[i]["teks"]) for i, _ in self.kandidat]
+        sudah_ada = set(self.alumni)
+        gabungan.kandidat.extend(k for k in baru.kandidat if k[0] not in sudah_ada)
+
+        gabungan.peluang, gabungan.peluang_pemilik = {}, {}
+        for jenis in self.peluang:
+            tetap = [(p, row) for p, row in zip(self.peluang_pemilik[jenis], self.peluang[jenis]) if p not in diganti]
+            gabungan.peluang[jenis] = [row for _, row in tetap] + baru.peluang[jenis]
+            gabungan.peluang_pemilik[jenis] = [p for p, _ in tetap] + baru.peluang_pemilik[jenis]
+        gabungan.versi = baru.versi
+        gabungan.dimuat = self.dimuat
+        gabungan.versi_db = None
+        gabungan.patch = (
+            self.versi, gabungan.versi,
+            [(posisi, gabungan.kandidat[posisi]) for posisi, (i, _) in enumerate(self.kandidat) if i in diganti],
+            gabungan.kandidat[len(self.kandidat):],
+            frozenset(diganti),
+            {jenis: (baru.peluang[jenis], baru.peluang_pemilik[jenis]) for jenis in self.peluang},
+        )
+        gabungan._versi_data = None
+        return gabungan
+
+
+def _baris_peluang(jenis, r):
+    return {k: r[k] for k in KOLOM_PELUANG[jenis]}
+
+
+def _hash(nilai) -> str:
+    return hashlib.sha256(json.dumps(nilai, default=str, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()[:32]
+
+
+async def muat(conn) -> IndeksProfil:
+    alumni_rows = await conn.fetch("SELECT id, nama_lengkap, nama_panggilan, aktivitas, skill_gabungan FROM alumni_db ORDER BY id")
+    pekerja_rows = await conn.fetch("SELECT alumni_id, skill, deskripsi_skill, sertifikasi, dukungan FROM alumni_pekerja")
+    irt_rows = await conn.fetch("SELECT alumni_id, bidang_minat, spesifik_bidang, pengalaman_kelas, perlu_grup FROM alumni_rumah_tangga")
+    bisnis_rows = await conn.fetch("SELECT alumni_id, nama_usaha, bidang_usaha, dukungan, kolaborasi, butuh_sdm, skill_praktikal FROM alumni_bisnis")
+    # Membangun teks profil untuk seluruh alumni cukup berat, jalankan di thread agar event loop tetap responsif
+    return await asyncio.to_thread(IndeksProfil, alumni_rows, pekerja_rows, irt_rows, bisnis_rows)
+
+
+_indeks = None
+_lock = asyncio.Lock()
+_tugas_muat = None
+
+
+async def _muat_ulang():
+    """
+    Memuat indeks baru dan menyiapkan process pool skoring untuknya sebelum ditukar, sehingga
+    request tetap memakai indeks lama (beserta pool-nya) sampai keduanya siap. Jika data tidak
+    berubah, indeks dan pool lama dipakai terus tanpa spawn worker baru.
+    """
+    global _indeks
+    lama = _indeks
+    conn = await db.buka_koneksi()
+    try:
+        # Versi dibaca sebelum data agar perubahan di antaranya terdeteksi pada pemuatan berikutnya
+        versi_db = await versi_data.baca(conn)
+        if lama is not None and versi_db is not None and versi_db == lama.versi_db:
+            lama.dimuat = time.monotonic()
+            return
+        indeks = await muat(conn)
+    finally:
+        await db.tutup_koneksi(conn)
+    indeks.versi_db = versi_db
+    if lama is not None and await asyncio.to_thread(indeks.versi_data) == await asyncio.to_thread(lama.versi_data):
+        lama.dimuat, lama.versi_db = time.monotonic(), versi_db
+        return
+    await skoring.siapkan_pool(indeks)
+    _indeks = indeks
+
+
+async def _muat_ulang_background():
+    global _tugas_muat
+    try:
+        async with _lock:
+            await _muat_ulang()
+    except Exception:
+        logger.exception("Memuat ulang indeks profil gagal, indeks lama tetap dipakai")
+    finally:
+        _tugas_muat = None
+
+
+async def dapatkan() -> IndeksProfil:
+    """
+    Indeks saat ini. Hanya pemuatan pertama yang ditunggu; setelah PROFILE_INDEX_TTL indeks
+    dimuat ulang di background sementara indeks lama tetap disajikan.
+    """
+    global _tugas_muat
+    if _indeks is None:
+        async with _lock:
+            if _indeks is None:
+                await _muat_ulang()
+    elif time.monotonic() - _indeks.dimuat >= PROFILE_INDEX_TTL and _tugas_muat is None:
+        _tugas_muat = asyncio.create_task(_muat_ulang_background())
+    return _indeks
+
+
+def sudah_dimuat() -> bool:
+    return _indeks is not None
+
+
+async def terapkan_pembaruan(alumni_rows, pekerja_rows, irt_rows, bisnis_rows):
+    """
+    Menerapkan data hasil impor ke indeks yang sedang dimuat (jika ada) secara inkremental.
+    Worker skoring menerima perubahan sebagai patch (lihat skoring.siapkan_pool); hanya impor
+    besar yang membuat pool dibangun ulang.
+    """
+    global _indeks
+    async with _lock:
+        if _indeks is None:
+            return
+        indeks = await asyncio.to_thread(_indeks.diperbarui, alumni_rows, pekerja_rows, irt_rows, bisnis_rows)
+        await skoring.siapkan_pool(indeks)
+        _indeks = indeks
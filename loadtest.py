@@ -0,0 +1,378 @@
+"""
+Harness load test untuk backend Alumni AI.
+
+Subcommand:
+  seed         Membuat skema di Postgres lokal dan mengisinya dengan alumni sintetis.
+  stub-gemini  Menjalankan server tiruan Gemini dengan distribusi latensi yang bisa diatur.
+  replay       Memutar ulang file JSONL hasil rekaman (CAPTURE_REQUESTS_PATH) ke aplikasi.
+  bandingkan   Membandingkan dua file hasil replay.
+  memori       Mengukur puncak memori pencarian kandidat pada ukuran tabel yang makin besar.
+
+Contoh alur:
+  python loadtest.py seed --dsn postgresql://localhost/alumni --jumlah 5000
+  python loadtest.py stub-gemini --port 8081 --latensi lognormal:7.0,0.4
+  GEMINI_API_BASE=http://127.0.0.1:8081 SUPABASE_DB_URL=postgresql://localhost/alumni uvicorn main:app
+  python loadtest.py replay rekaman.jsonl --rate 5 --concurrency 10 --output hasil_a.json
+  python loadtest.py bandingkan hasil_a.json hasil_b.json
+  python loadtest.py memori --dsn postgresql://localhost/alumni --ukuran 1000,5000,20000
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import time
+
+import httpx
+
+SKEMA_LOKAL = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sql", "skema_lokal.sql")
+
+# Kosakata sederhana untuk data sintetis
+SKILL_POOL = [
+    "python", "data analysis", "desain grafis", "marketing digital", "akuntansi", "public speaking",
+    "fotografi", "copywriting", "manajemen proyek", "pemrograman web", "mengajar", "memasak",
+    "video editing", "penjualan", "keuangan", "sdm", "riset", "bahasa inggris", "hukum", "kesehatan",
+]
+BIDANG_POOL = ["kuliner", "pendidikan", "teknologi", "fashion", "kesehatan", "konsultasi", "kerajinan", "media"]
+NAMA_DEPAN = ["Andi", "Budi", "Citra", "Dewi", "Eka", "Fajar", "Gita", "Hadi", "Indah", "Joko", "Kartika", "Lestari"]
+NAMA_BELAKANG = ["Saputra", "Wijaya", "Pratama", "Lestari", "Nugroho", "Hidayat", "Kusuma", "Rahmawati"]
+AKTIVITAS_POOL = ["bekerja", "bisnis / freelance", "ibu rumah tangga"]
+
+
+def _ambil_skill(rng, n):
+    return ", ".join(rng.sample(SKILL_POOL, n))
+
+
+async def seed(args):
+    """
+    Membuat tabel (jika belum ada) lalu mengisi alumni sintetis secara deterministik.
+    """
+    import asyncpg
+
+    rng = random.Random(args.seed)
+    conn = await asyncpg.connect(args.dsn)
+    try:
+        with open(SKEMA_LOKAL, encoding="utf-8") as f:
+            await conn.execute(f.read())
+        tabel_semua = ["alumni_db", "alumni_pekerja", "alumni_bisnis", "alumni_rumah_tangga"]
+        async with conn.transaction():
+            # Jika migrasi alumni_search sudah dijalankan, kosongkan juga dan matikan trigger selama COPY
+            # (sama seperti impor_alumni); dokumen disegarkan sekaligus di akhir
+            ada_search = await conn.fetchval("SELECT to_regclass('alumni_search') IS NOT NULL")
+            await conn.execute(f"TRUNCATE {', '.join(tabel_semua + (['alumni_search'] if ada_search else []))} RESTART IDENTITY")
+            if ada_search:
+                for tabel in tabel_semua:
+                    await conn.execute(f"ALTER TABLE {tabel} DISABLE TRIGGER alumni_search_sync")
+            alumni_rows, pekerja_rows, bisnis_rows, irt_rows = [], [], [], []
+            for alumni_id in range(1, args.jumlah + 1):
+                aktivitas = rng.sample(AKTIVITAS_POOL, rng.choice([1, 1, 1, 2]))
+                nama = f"{rng.choice(NAMA_DEPAN)} {rng.choice(NAMA_BELAKANG)} {alumni_id}"
+                alumni_rows.append((alumni_id, nama, nama.split()[0], ", ".join(aktivitas), _ambil_skill(rng, rng.randint(1, 6))))
+                if "bekerja" in aktivitas:
+                    pekerja_rows.append((alumni_id, _ambil_skill(rng, 1), f"berpengalaman di {_ambil_skill(rng, 2)}",
+                                         rng.choice(["", "sertifikasi profesional"]), f"butuh mentor {_ambil_skill(rng, 1)}"))
+                if "bisnis / freelance" in aktivitas:
+                    bidang = rng.choice(BIDANG_POOL)
+                    bisnis_rows.append((alumni_id, f"Usaha {bidang.title()} {alumni_id}", bidang, f"butuh {_ambil_skill(rng, 1)}",
+                                        f"kolaborasi {_ambil_skill(rng, 1)}", f"{_ambil_skill(rng, 1)}", _ambil_skill(rng, 2)))
+                if "ibu rumah tangga" in aktivitas:
+                    irt_rows.append((alumni_id, rng.choice(BIDANG_POOL), _ambil_skill(rng, 1),
+                                     rng.choice(["pernah", "belum"]), rng.choice(["ya", "tidak"])))
+
+            await conn.copy_records_to_table("alumni_db", records=alumni_rows,
+                                             columns=["id", "nama_lengkap", "nama_panggilan", "aktivitas", "skill_gabungan"])
+            await conn.copy_records_to_table("alumni_pekerja", records=pekerja_rows,
+                                             columns=["alumni_id", "skill", "deskripsi_skill", "sertifikasi", "dukungan"])
+            await conn.copy_records_to_table("alumni_bisnis", records=bisnis_rows,
+                                             columns=["alumni_id", "nama_usaha", "bidang_usaha", "dukungan", "kolaborasi", "butuh_sdm", "skill_praktikal"])
+            await conn.copy_records_to_table("alumni_rumah_tangga", records=irt_rows,
+                                             columns=["alumni_id", "bidang_minat", "spesifik_bidang", "pengalaman_kelas", "perlu_grup"])
+            await conn.execute("SELECT setval(pg_get_serial_sequence('alumni_db', 'id'), $1)", args.jumlah)
+            if ada_search:
+                for tabel in tabel_semua:
+                    await conn.execute(f"ALTER TABLE {tabel} ENABLE TRIGGER alumni_search_sync")
+                await conn.execute("INSERT INTO alumni_search (alumni_id, dokumen) SELECT id, coalesce(alumni_search_dokumen(id), '') FROM alumni_db")
+        print(f"Seed selesai: {args.jumlah} alumni, {len(pekerja_rows)} pekerja, {len(bisnis_rows)} bisnis, {len(irt_rows)} IRT")
+    finally:
+        await conn.close()
+
+
+def parse_latensi(spec: str):
+    """
+    Mengubah spesifikasi latensi (dalam milidetik) menjadi fungsi sampler.
+    Format: fixed:300 | uniform:200,800 | normal:500,100 | lognormal:6.2,0.5
+    """
+    jenis, _, param = spec.partition(":")
+    nilai = [float(p) for p in param.split(",") if p]
+    if jenis == "fixed":
+        return lambda: nilai[0]
+    if jenis == "uniform":
+        return lambda: random.uniform(nilai[0], nilai[1])
+    if jenis == "normal":
+        return lambda: max(0.0, random.gauss(nilai[0], nilai[1]))
+    if jenis == "lognormal":
+        return lambda: random.lognormvariate(nilai[0], nilai[1])
+    raise ValueError(f"Distribusi latensi tidak dikenal: {spec}")
+
+
+def isi_skema(skema, rng):
+    """
+    Nilai tiruan yang sesuai responseSchema (mode ringkas): enum dipilih acak, teks diisi kata pengisi.
+    """
+    tipe = skema["type"]
+    if tipe == "OBJECT":
+        return {k: isi_skema(v, rng) for k, v in skema["properties"].items()}
+    if tipe == "ARRAY":
+        jumlah = rng.randint(1, 5)
+        if "enum" in skema["items"]:
+            return rng.sample(skema["items"]["enum"], min(jumlah, len(skema["items"]["enum"])))
+        return [isi_skema(skema["items"], rng) for _ in range(jumlah)]
+    if tipe == "STRING" and "enum" in skema:
+        return rng.choice(skema["enum"])
+    if tipe == "STRING":
+        return " ".join(["rekomendasi"] * rng.randint(3, 15))
+    return 1
+
+
+def buat_stub_gemini(latensi: str, error_rate: float):
+    """
+    Aplikasi FastAPI yang meniru endpoint generateContent Gemini.
+    """
+    from fastapi import FastAPI, Request
+    from fastapi.responses import JSONResponse
+
+    sampler = parse_latensi(latensi)
+    stub = FastAPI()
+
+    @stub.post("/v1beta/models/{model_action}")
+    async def generate_content(model_action: str, request: Request):
+        body = await request.json()
+        await asyncio.sleep(sampler() / 1000.0)
+        if random.random() < error_rate:
+            return JSONResponse(status_code=503, content={"error": {"code": 503, "message": "stub overloaded"}})
+        config = body.get("generationConfig", {})
+        if config.get("responseMimeType") == "application/json" and "responseSchema" in config:
+            teks = json.dumps(isi_skema(config["responseSchema"], random), ensure_ascii=False)
+            return {
+                "candidates": [{"content": {"role": "model", "parts": [{"text": teks}]}, "finishReason": "STOP"}],
+                # Perkiraan kasar: sekitar 4 karakter per token
+                "usageMetadata": {"candidatesTokenCount": max(1, len(teks) // 4)},
+            }
+        max_token = config.get("maxOutputTokens", 2500)
+        jumlah_kata = min(max_token, 400)
+        teks = " ".join(["rekomendasi"] * jumlah_kata)
+        return {
+            "candidates": [{"content": {"role": "model", "parts": [{"text": teks}]}, "finishReason": "STOP"}],
+            "usageMetadata": {"candidatesTokenCount": jumlah_kata},
+        }
+
+    return stub
+
+
+def stub_gemini(args):
+    import uvicorn
+
+    uvicorn.run(buat_stub_gemini(args.latensi, args.error_rate), host=args.host, port=args.port, log_level="warning")
+
+
+def baca_rekaman(path: str):
+    """
+    Membaca file JSONL rekaman menjadi list (endpoint, payload).
+    """
+    items = []
+    with open(path, encoding="utf-8") as f:
+        for baris in f:
+            baris = baris.strip()
+            if not baris:
+                continue
+            rec = json.loads(baris)
+            items.append((rec["endpoint"], rec["payload"]))
+    return items
+
+
+def persentil(nilai_terurut, p):
+    """
+    Persentil nearest-rank dari list yang sudah diurutkan.
+    """
+    if not nilai_terurut:
+        return None
+    idx = max(0, min(len(nilai_terurut) - 1, math.ceil(p / 100.0 * len(nilai_terurut)) - 1))
+    return nilai_terurut[idx]
+
+
+def ringkas_hasil(hasil, durasi):
+    latensi = sorted(h["latensi_ms"] for h in hasil)
+    antre = sorted(h["antre_ms"] for h in hasil if "antre_ms" in h)
+    error = sum(1 for h in hasil if h["status"] is None or h["status"] >= 400)
+    return {
+        "total": len(hasil),
+        "error": error,
+        "error_rate": error / len(hasil) if hasil else 0.0,
+        "durasi_s": durasi,
+        "throughput_rps": len(hasil) / durasi if durasi > 0 else 0.0,
+        "p50_ms": persentil(latensi, 50),
+        "p95_ms": persentil(latensi, 95),
+        "p99_ms": persentil(latensi, 99),
+        "p95_antre_ms": persentil(antre, 95),
+        "p99_antre_ms": persentil(antre, 99),
+    }
+
+
+async def replay(args):
+    """
+    Memutar ulang rekaman dengan laju (request/detik) dan concurrency yang bisa diatur.
+
+    Dengan --rate (open-loop), latensi diukur dari waktu kirim terjadwal, bukan dari saat slot
+    concurrency didapat, sehingga waktu antre saat server jenuh ikut terhitung (tanpa coordinated
+    omission). Waktu antre di balik --concurrency juga dilaporkan terpisah sebagai antre_ms.
+    """
+    items = baca_rekaman(args.file) * args.ulang
+    if not items:
+        raise SystemExit("File rekaman kosong.")
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+    hasil = []
+
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout) as client:
+        async def kirim(endpoint, payload, dijadwalkan):
+            async with semaphore:
+                mulai = time.perf_counter()
+                status, error = None, None
+                try:
+                    res = await client.post(endpoint, json=payload)
+                    status = res.status_code
+                except httpx.HTTPError as e:
+                    error = type(e).__name__
+            selesai = time.perf_counter()
+            # Closed-loop (tanpa --rate) tidak punya jadwal: latensi adalah waktu layanan
+            acuan = dijadwalkan if args.rate > 0 else mulai
+            hasil.append({"endpoint": endpoint, "status": status, "error": error,
+                          "latensi_ms": (selesai - acuan) * 1000.0, "antre_ms": (mulai - dijadwalkan) * 1000.0})
+
+        mulai_total = time.perf_counter()
+        tasks = []
+        for i, (endpoint, payload) in enumerate(items):
+            dijadwalkan = time.perf_counter()
+            if args.rate > 0:
+                # Jadwal open-loop: request ke-i dikirim pada t0 + i / rate
+                dijadwalkan = mulai_total + i / args.rate
+                tunggu = dijadwalkan - time.perf_counter()
+                if tunggu > 0:
+                    await asyncio.sleep(tunggu)
+            tasks.append(asyncio.create_task(kirim(endpoint, payload, dijadwalkan)))
+        await asyncio.gather(*tasks)
+        durasi = time.perf_counter() - mulai_total
+
+    laporan = {
+        "konfigurasi": {"file": args.file, "base_url": args.base_url, "rate": args.rate,
+                        "concurrency": args.concurrency, "ulang": args.ulang},
+        "ringkasan": ringkas_hasil(hasil, durasi),
+        "per_endpoint": {
+            ep: ringkas_hasil([h for h in hasil if h["endpoint"] == ep], durasi)
+            for ep in sorted({h["endpoint"] for h in hasil})
+        },
+    }
+    print(json.dumps(laporan, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(laporan, f, indent=2)
+
+
+def bandingkan(args):
+    """
+    Menampilkan selisih metrik antara dua hasil replay (B relatif terhadap A).
+    """
+    with open(args.a, encoding="utf-8") as f:
+        a = json.load(f)["ringkasan"]
+    with open(args.b, encoding="utf-8") as f:
+        b = json.load(f)["ringkasan"]
+    print(f"{'metrik':<16}{'A':>14}{'B':>14}{'delta':>12}")
+    for metrik in ["throughput_rps", "p50_ms", "p95_ms", "p99_ms", "p95_antre_ms", "error_rate"]:
+        va, vb = a.get(metrik), b.get(metrik)
+        if va is None or vb is None:
+            print(f"{metrik:<16}{str(va):>14}{str(vb):>14}{'-':>12}")
+            continue
+        delta = f"{(vb - va) / va * 100:+.1f}%" if va else "-"
+        print(f"{metrik:<16}{va:>14.2f}{vb:>14.2f}{delta:>12}")
+
+
+async def memori(args):
+    """
+    Untuk setiap ukuran tabel: seed ulang, lalu jalankan satu pencarian kandidat proyek per mode
+    dan laporkan puncak alokasi Python (tracemalloc). Tabel akan di-TRUNCATE oleh seed.
+    """
+    import tracemalloc
+
+    # db.py membaca SUPABASE_DB_URL saat diimpor
+    os.environ["SUPABASE_DB_URL"] = args.dsn
+    import main as app
+
+    print(f"{'alumni':>8}{'mode':>10}{'puncak_kb':>12}{'durasi_ms':>12}  sama dengan mode pertama")
+    for jumlah in [int(u) for u in args.ukuran.split(",") if u.strip()]:
+        await seed(argparse.Namespace(dsn=args.dsn, jumlah=jumlah, seed=args.seed))
+        acuan = None
+        for mode in [m.strip() for m in args.mode.split(",") if m.strip()]:
+            tracemalloc.start()
+            mulai = time.perf_counter()
+            hasil = await app.cari_alumni_untuk_proyek(args.teks, mode=mode)
+            durasi = (time.perf_counter() - mulai) * 1000
+            _, puncak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            nama = [(a["nama_lengkap"], a["match_score"]) for a in hasil]
+            if acuan is None:
+                acuan = nama
+            print(f"{jumlah:>8}{mode:>10}{puncak / 1024:>12.1f}{durasi:>12.1f}  {'ya' if nama == acuan else 'tidak'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test harness Alumni AI")
+    sub = parser.add_subparsers(dest="perintah", required=True)
+
+    p_seed = sub.add_parser("seed", help="isi Postgres lokal dengan alumni sintetis")
+    # Sengaja tanpa default dari SUPABASE_DB_URL: seed men-TRUNCATE tabel alumni
+    p_seed.add_argument("--dsn", required=True, help="DSN Postgres lokal (tabel alumni akan di-TRUNCATE)")
+    p_seed.add_argument("--jumlah", type=int, default=1000)
+    p_seed.add_argument("--seed", type=int, default=42)
+
+    p_stub = sub.add_parser("stub-gemini", help="jalankan server tiruan Gemini")
+    p_stub.add_argument("--host", default="127.0.0.1")
+    p_stub.add_argument("--port", type=int, default=8081)
+    p_stub.add_argument("--latensi", default="lognormal:7.0,0.4", help="distribusi latensi dalam ms")
+    p_stub.add_argument("--error-rate", type=float, default=0.0)
+
+    p_replay = sub.add_parser("replay", help="putar ulang rekaman JSONL")
+    p_replay.add_argument("file")
+    p_replay.add_argument("--base-url", default="http://127.0.0.1:8000")
+    p_replay.add_argument("--rate", type=float, default=0.0, help="request per detik (0 = secepatnya)")
+    p_replay.add_argument("--concurrency", type=int, default=10)
+    p_replay.add_argument("--ulang", type=int, default=1, help="berapa kali rekaman diputar")
+    p_replay.add_argument("--timeout", type=float, default=120.0)
+    p_replay.add_argument("--output")
+
+    p_banding = sub.add_parser("bandingkan", help="bandingkan dua hasil replay")
+    p_banding.add_argument("a")
+    p_banding.add_argument("b")
+
+    p_memori = sub.add_parser("memori", help="ukur puncak memori pencarian kandidat per ukuran tabel")
+    p_memori.add_argument("--dsn", required=True, help="DSN Postgres lokal (tabel alumni akan di-TRUNCATE)")
+    p_memori.add_argument("--ukuran", default="1000,5000,20000", help="jumlah alumni, dipisah koma")
+    p_memori.add_argument("--mode", default="python,stream", help="SEARCH_MODE yang dibandingkan, dipisah koma")
+    p_memori.add_argument("--teks", default="aplikasi python data analysis marketing digital fotografi")
+    p_memori.add_argument("--seed", type=int, default=42)
+
+    args = parser.parse_args()
+    if args.perintah == "seed":
+        asyncio.run(seed(args))
+    elif args.perintah == "stub-gemini":
+        stub_gemini(args)
+    elif args.perintah == "replay":
+        asyncio.run(replay(args))
+    elif args.perintah == "bandingkan":
+        bandingkan(args)
+    elif args.perintah == "memori":
+        asyncio.run(memori(args))
+
+
+if __name__ == "__main__":
+    main()
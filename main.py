@@ -1,21 +1,134 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse, JSONResponse, Response
 from pydantic import BaseModel
 import os
 import httpx
-import asyncpg
 import traceback # Import module traceback
+import io
+import json
+import hashlib
+import tempfile
+import re
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 from fastapi.middleware.cors import CORSMiddleware # Import CORSMiddleware
+from profiling import diprofil, is_admin, daftar_profil, path_profil
+import precompute
+from deadline import Deadline
+import indeks_profil
+import skoring
+import impor_alumni
+import db
+import ringkas
+import versi_data
 
 # Muat variabel lingkungan
 load_dotenv()
 SUPABASE_DB_URL = os.getenv("SUPABASE_DB_URL")
 # Ganti dengan variabel lingkungan untuk API Key Gemini Anda
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY") 
-
-app = FastAPI()
-
-
+# Base URL Gemini bisa diarahkan ke stub lokal untuk load test (lihat loadtest.py)
+GEMINI_API_BASE = os.getenv("GEMINI_API_BASE", "https://generativelanguage.googleapis.com").rstrip("/")
+# Jika diisi, payload /rekomendasi dan /proyek_rekomendasi direkam sebagai JSONL untuk di-replay
+CAPTURE_REQUESTS_PATH = os.getenv("CAPTURE_REQUESTS_PATH", "")
+# "python" = skor kandidat di aplikasi (default), "db" = ts_rank di Postgres (butuh migrasi 001_alumni_search),
+# "indeks" = indeks profil in-memory dengan skoring di process pool (lihat skoring.py),
+# "stream" = scan lewat server-side cursor dengan top-k heap (memori per request konstan)
+SEARCH_MODE = os.getenv("SEARCH_MODE", "python")
+# Jumlah baris per fetch dari cursor untuk SEARCH_MODE=stream
+STREAM_BATCH_SIZE = int(os.getenv("STREAM_BATCH_SIZE", "500"))
+# "single" = satu generasi untuk semua bagian (default), "sectioned" = tiap bagian dibuat paralel,
+# "ringkas" = Gemini hanya mengembalikan JSON kecil dan teks akhir disusun di server (lihat ringkas.py)
+GENERATION_MODE = os.getenv("GENERATION_MODE", "single")
+# Cache hasil per bagian untuk mode sectioned (detik dan jumlah entri)
+SECTION_CACHE_TTL = float(os.getenv("SECTION_CACHE_TTL", "3600"))
+SECTION_CACHE_SIZE = int(os.getenv("SECTION_CACHE_SIZE", "512"))
+# Jumlah percobaan ulang untuk error Gemini yang bersifat sementara (429/5xx/koneksi)
+LLM_RETRIES = int(os.getenv("LLM_RETRIES", "2"))
+# Cache-Control max-age (detik) untuk GET /proyek_rekomendasi; hasilnya sama untuk semua pengguna
+PROYEK_CACHE_MAX_AGE = int(os.getenv("PROYEK_CACHE_MAX_AGE", "300"))
+# Jumlah representasi GET yang disimpan per ETag, agar ETag kuat selalu menunjuk isi yang sama
+ETAG_CACHE_SIZE = int(os.getenv("ETAG_CACHE_SIZE", "512"))
+# Jeda sebelum fase warm-up wajib yang gagal (misalnya DB belum bisa dihubungi) dicoba lagi
+WARMUP_RETRY_SECONDS = float(os.getenv("WARMUP_RETRY_SECONDS", "5"))
+
+# basicConfig tidak berpengaruh jika logging sudah dikonfigurasi oleh server
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"))
+logger = logging.getLogger("alumni_ai")
+
+# Client HTTP bersama untuk Gemini, dibuat di lifespan agar koneksi TLS dipakai ulang antar request
+_http_client = None
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global _http_client, _antrean_rekaman
+    _http_client = httpx.AsyncClient(timeout=90.0)
+    perekam = None
+    if CAPTURE_REQUESTS_PATH:
+        _antrean_rekaman = asyncio.Queue()
+        perekam = asyncio.create_task(jalankan_perekam())
+    # Warm-up berjalan di background: GET / langsung hidup, GET /ready menunggu warm-up selesai
+    warmup = asyncio.create_task(jalankan_warmup(app))
+    scheduler = None
+    if precompute.PRECOMPUTE_ENABLED:
+        # Batch prakomputasi berjalan di background pada jam off-peak
+        scheduler = asyncio.create_task(precompute.jalankan_scheduler(ambil_semua_nama_alumni, regenerasi_rekomendasi))
+    yield
+    warmup.cancel()
+    if scheduler:
+        scheduler.cancel()
+    if perekam:
+        # None menandai akhir antrean; tunggu rekaman yang tersisa selesai ditulis
+        _antrean_rekaman.put_nowait(None)
+        await perekam
+        _antrean_rekaman = None
+    skoring.tutup_pool()
+    await _http_client.aclose()
+    _http_client = None
+    await db.tutup_pool()
+
+app = FastAPI(lifespan=lifespan)
+
+
+
+# Baris rekaman ditulis task background (dibuat di lifespan) agar request tidak menunggu I/O file
+_antrean_rekaman = None
+
+def catat_request(endpoint: str, payload: dict):
+    """
+    Menyimpan satu baris JSONL berisi endpoint dan payload request (jika perekaman aktif).
+    """
+    if not CAPTURE_REQUESTS_PATH:
+        return
+    baris = json.dumps({"ts": time.time(), "endpoint": endpoint, "payload": payload}, ensure_ascii=False)
+    if _antrean_rekaman is None:
+        # Di luar lifespan (misalnya dipanggil dari skrip) tidak ada penulis background
+        _tulis_rekaman([baris])
+        return
+    _antrean_rekaman.put_nowait(baris)
+
+def _tulis_rekaman(daftar_baris):
+    with open(CAPTURE_REQUESTS_PATH, "a", encoding="utf-8") as f:
+        f.write("".join(baris + "\n" for baris in daftar_baris))
+
+async def jalankan_perekam():
+    """
+    Menulis baris rekaman dari antrean ke file di thread, beberapa baris sekaligus.
+    """
+    selesai = False
+    while not selesai:
+        daftar_baris = [await _antrean_rekaman.get()]
+        while not _antrean_rekaman.empty():
+            daftar_baris.append(_antrean_rekaman.get_nowait())
+        selesai = None in daftar_baris
+        try:
+            await asyncio.to_thread(_tulis_rekaman, [b for b in daftar_baris if b is not None])
+        except Exception:
+            logger.exception("Gagal menulis rekaman request ke %s", CAPTURE_REQUESTS_PATH)
 
 # Endpoint utama untuk menghindari error 404 pada /
 @app.get("/")
@@ -32,15 +145,128 @@ class ProyekInput(BaseModel):
     ide_proyek: str # Ini adalah satu kolom isian yang menampung judul dan/atau deskripsi
     language: str = "id"  # default Bahasa Indonesia
 
-async def cari_top_alumni_kolaborasi(current_alumni_id: int, current_alumni_full_profile_text: str):
+def buat_tsquery(teks: str) -> str:
+    """
+    Mengubah teks bebas menjadi tsquery OR dengan prefix match, misalnya "data python" -> "data:* | python:*".
+    Hanya token alfanumerik yang dipakai sehingga aman untuk to_tsquery.
+    """
+    tokens = sorted(set(re.findall(r"[^\W_]+", teks.lower())))
+    return " | ".join(f"{t}:*" for t in tokens)
+
+async def cari_kandidat_db(conn, teks_kunci: str, batas: int, kecuali_id: int = None):
+    """
+    Mencari kandidat alumni di sisi database memakai tabel alumni_search (GIN + ts_rank).
+    Hanya `batas` baris teratas yang dikirim lewat jaringan.
+    """
+    query = buat_tsquery(teks_kunci)
+    if not query:
+        return []
+    return await conn.fetch("""
+        SELECT a.id, a.nama_lengkap, a.aktivitas, a.skill_gabungan, s.dokumen,
+               ts_rank(s.dokumen_tsv, q) AS skor
+        FROM alumni_search s
+        JOIN alumni_db a ON a.id = s.alumni_id
+        CROSS JOIN to_tsquery('simple', $1) AS q
+        WHERE s.dokumen_tsv @@ q AND ($2::int IS NULL OR a.id <> $2)
+        ORDER BY skor DESC, a.id
+        LIMIT $3
+    """, query, kecuali_id, batas)
+
+# Satu query untuk alumni beserta detail aktivitasnya; LATERAL ... LIMIT 1 setara dengan fetchrow per alumni
+QUERY_SCAN_STREAM = """
+    SELECT a.id, a.nama_lengkap, a.aktivitas, a.skill_gabungan,
+           p.skill, p.deskripsi_skill, p.sertifikasi, p.dukungan AS pekerja_dukungan,
+           r.bidang_minat, r.spesifik_bidang, r.pengalaman_kelas, r.perlu_grup,
+           b.bidang_usaha, b.dukungan AS bisnis_dukungan, b.kolaborasi, b.butuh_sdm, b.skill_praktikal
+    FROM alumni_db a
+    LEFT JOIN LATERAL (SELECT skill, deskripsi_skill, sertifikasi, dukungan
+                       FROM alumni_pekerja WHERE alumni_id = a.id LIMIT 1) p ON true
+    LEFT JOIN LATERAL (SELECT bidang_minat, spesifik_bidang, pengalaman_kelas, perlu_grup
+                       FROM alumni_rumah_tangga WHERE alumni_id = a.id LIMIT 1) r ON true
+    LEFT JOIN LATERAL (SELECT bidang_usaha, dukungan, kolaborasi, butuh_sdm, skill_praktikal
+                       FROM alumni_bisnis WHERE alumni_id = a.id LIMIT 1) b ON true
+    WHERE $1::int IS NULL OR a.id != $1
+"""
+
+async def scan_kandidat_stream(conn, keywords, k: int, kecuali_id: int = None):
+    """
+    Top-k kandidat dengan membaca alumni lewat server-side cursor per STREAM_BATCH_SIZE baris.
+    Hanya k kandidat terbaik yang disimpan sehingga memori per request tidak tumbuh dengan
+    jumlah alumni. Mengembalikan list (skor, dict alumni) terurut seperti implementasi awal.
+    """
+    heap, urutan = [], 0
+    # Server-side cursor hanya bisa dipakai di dalam transaksi
+    async with conn.transaction():
+        cursor = await conn.cursor(QUERY_SCAN_STREAM, kecuali_id)
+        while True:
+            rows = await cursor.fetch(STREAM_BATCH_SIZE)
+            if not rows:
+                break
+            for r in rows:
+                teks = skoring.susun_teks_profil(
+                    r["skill_gabungan"], r["aktivitas"],
+                    {"skill": r["skill"], "deskripsi_skill": r["deskripsi_skill"], "sertifikasi": r["sertifikasi"], "dukungan": r["pekerja_dukungan"]},
+                    {"bidang_minat": r["bidang_minat"], "spesifik_bidang": r["spesifik_bidang"], "pengalaman_kelas": r["pengalaman_kelas"], "perlu_grup": r["perlu_grup"]},
+                    {"bidang_usaha": r["bidang_usaha"], "dukungan": r["bisnis_dukungan"], "kolaborasi": r["kolaborasi"], "butuh_sdm": r["butuh_sdm"], "skill_praktikal": r["skill_praktikal"]},
+                )
+                skor = skoring.skor_teks(keywords, teks)
+                if skor > 0:
+                    skoring.tambah_top_k(heap, k, skor, urutan, lambda: {
+                        "id": r["id"],
+                        "nama_lengkap": r["nama_lengkap"],
+                        "aktivitas": r["aktivitas"],
+                        "skill_gabungan": r["skill_gabungan"] or "",
+                        "teks": teks,
+                    })
+                urutan += 1
+    return skoring.urutkan_top_k(heap)
+
+async def cari_top_alumni_kolaborasi(current_alumni_id: int, current_alumni_full_profile_text: str, mode: str = None):
     """
     Mencari hingga 5 alumni lain yang paling relevan untuk kolaborasi
     berdasarkan keahlian dan detail profil alumni yang sedang diproses.
     """
-    # Menambahkan statement_cache_size=0 untuk mengatasi error prepared statement
-    conn = await asyncpg.connect(SUPABASE_DB_URL, statement_cache_size=0)
+    if (mode or SEARCH_MODE) == "indeks":
+        indeks = await indeks_profil.dapatkan()
+        keywords = set(current_alumni_full_profile_text.lower().split())
+        hasil = []
+        for match_score, posisi in await skoring.top_k_async(indeks, keywords, 5, current_alumni_id):
+            alumni = indeks.alumni_pada(posisi)
+            hasil.append({
+                "id": alumni["id"],
+                "nama_alumni_kolaborasi": alumni["nama_lengkap"],
+                "aktivitas": alumni["aktivitas"],
+                "relevance_skills": alumni["skill_gabungan"],
+                "relevance_detail_summary": alumni["teks"],
+                "match_score": match_score
+            })
+        return hasil
+
+    conn = await db.buka_koneksi()
     
     try: # Menambahkan try-except di sini untuk menangkap error database spesifik
+        if (mode or SEARCH_MODE) == "db":
+            rows = await cari_kandidat_db(conn, current_alumni_full_profile_text, 5, current_alumni_id)
+            return [{
+                "id": r["id"],
+                "nama_alumni_kolaborasi": r["nama_lengkap"],
+                "aktivitas": r["aktivitas"],
+                "relevance_skills": r["skill_gabungan"] or "",
+                "relevance_detail_summary": r["dokumen"],
+                "match_score": r["skor"]
+            } for r in rows]
+
+        if (mode or SEARCH_MODE) == "stream":
+            keywords = set(current_alumni_full_profile_text.lower().split())
+            return [{
+                "id": alumni["id"],
+                "nama_alumni_kolaborasi": alumni["nama_lengkap"],
+                "aktivitas": alumni["aktivitas"],
+                "relevance_skills": alumni["skill_gabungan"],
+                "relevance_detail_summary": alumni["teks"],
+                "match_score": match_score
+            } for match_score, alumni in await scan_kandidat_stream(conn, keywords, 5, current_alumni_id)]
+
         # Ambil semua alumni dari alumni_db kecuali alumni saat ini, termasuk skill_gabungan
         all_alumni_general = await conn.fetch(
             "SELECT id, nama_lengkap, aktivitas, skill_gabungan FROM alumni_db WHERE id != $1", # Menggunakan skill_gabungan
@@ -103,6 +329,7 @@ async def cari_top_alumni_kolaborasi(current_alumni_id: int, current_alumni_full
             if match_score > 0: # Hanya tambahkan jika ada kecocokan
                 # Tambahkan ringkasan yang akan disajikan ke LLM, termasuk nama dan skill relevan
                 all_relevant_alumni.append({
+                    "id": other_alumni_id,
                     "nama_alumni_kolaborasi": other_alumni_nama, 
                     "aktivitas": other_alumni_aktivitas_gabungan, # Menyimpan aktivitas gabungan
                     "relevance_skills": other_alumni_skills_gabungan_from_db, # Kirim skill_gabungan dari DB
@@ -118,22 +345,31 @@ async def cari_top_alumni_kolaborasi(current_alumni_id: int, current_alumni_full
 
         return top_5_alumni # Mengembalikan top 5 alumni
     finally:
-        await conn.close() 
-
-async def ambil_profil_alumni(nama_lengkap: str):
+        await db.tutup_koneksi(conn) 
+
+# Query yang dijalankan setiap request /rekomendasi; juga dijalankan sekali saat warm-up
+QUERY_ALUMNI_NAMA = """
+    SELECT id, nama_lengkap, nama_panggilan, aktivitas, skill_gabungan
+    FROM alumni_db WHERE LOWER(TRIM(nama_lengkap)) = LOWER(TRIM($1))
+"""
+QUERY_PELUANG = {
+    "bisnis": "SELECT nama_usaha, dukungan, kolaborasi, butuh_sdm FROM alumni_bisnis",
+    "pekerja": "SELECT skill, deskripsi_skill, sertifikasi, dukungan FROM alumni_pekerja",
+    "irt": "SELECT bidang_minat, spesifik_bidang, pengalaman_kelas, perlu_grup FROM alumni_rumah_tangga",
+}
+
+async def ambil_profil_alumni(nama_lengkap: str, deadline: Deadline = None):
     """
     Mengambil profil lengkap alumni dari database berdasarkan nama lengkap (non-exact match).
+    Jika deadline diberikan, daftar peluang dan pencarian kolaborator dianggap opsional
+    dan bisa dilewati saat sisa waktu tidak cukup.
     """
-    # Menambahkan statement_cache_size=0 untuk mengatasi error prepared statement
-    conn = await asyncpg.connect(SUPABASE_DB_URL, statement_cache_size=0)
+    conn = await db.buka_koneksi()
     
     try: 
         # Menambahkan nama_panggilan dan skill_gabungan ke query SELECT
         # Menggunakan TRIM() untuk menangani spasi di awal/akhir input dan kolom database
-        row = await conn.fetchrow("""
-            SELECT id, nama_lengkap, nama_panggilan, aktivitas, skill_gabungan
-            FROM alumni_db WHERE LOWER(TRIM(nama_lengkap)) = LOWER(TRIM($1))
-        """, nama_lengkap)
+        row = await conn.fetchrow(QUERY_ALUMNI_NAMA, nama_lengkap)
 
         if not row:
             raise HTTPException(status_code=404, detail="Alumni tidak ditemukan")
@@ -188,16 +424,29 @@ async def ambil_profil_alumni(nama_lengkap: str):
             if not row_val: return False
             return any(skill.lower() in row_val.lower() for skill in skills_for_cocok) # Menggunakan skills_for_cocok
 
-        bisnis_rows = await conn.fetch("SELECT nama_usaha, dukungan, kolaborasi, butuh_sdm FROM alumni_bisnis") 
-        pekerja_rows = await conn.fetch("SELECT skill, deskripsi_skill, sertifikasi, dukungan FROM alumni_pekerja")
-        irt_rows = await conn.fetch("SELECT bidang_minat, spesifik_bidang, pengalaman_kelas, perlu_grup FROM alumni_rumah_tangga")
-        
-        peluang_bisnis = [dict(r) for r in bisnis_rows if cocok(r["dukungan"] or "") or cocok(r["kolaborasi"] or "") or cocok(r["butuh_sdm"] or "")]
-        peluang_pekerja = [dict(r) for r in pekerja_rows if cocok(r["skill"] or "") or cocok(r["deskripsi_skill"] or "") or cocok(r["dukungan"] or "")]
-        peluang_irt = [dict(r) for r in irt_rows if cocok(r["bidang_minat"] or "") or cocok(r["spesifik_bidang"] or "") or cocok(r["perlu_grup"] or "")]
+        async def ambil_peluang():
+            if SEARCH_MODE == "indeks":
+                # Pencocokan dijalankan di process pool terhadap baris peluang yang sudah ada di indeks
+                peluang = await skoring.cocok_peluang_async(await indeks_profil.dapatkan(), skills_for_cocok)
+                return peluang["bisnis"], peluang["pekerja"], peluang["irt"]
 
-        # Panggil fungsi baru untuk mencari top 5 alumni kolaborasi
-        top_alumni_kolaborasi = await cari_top_alumni_kolaborasi(alumni_id, current_alumni_full_profile_text)
+            bisnis_rows = await conn.fetch(QUERY_PELUANG["bisnis"])
+            pekerja_rows = await conn.fetch(QUERY_PELUANG["pekerja"])
+            irt_rows = await conn.fetch(QUERY_PELUANG["irt"])
+            
+            peluang_bisnis = [dict(r) for r in bisnis_rows if cocok(r["dukungan"] or "") or cocok(r["kolaborasi"] or "") or cocok(r["butuh_sdm"] or "")]
+            peluang_pekerja = [dict(r) for r in pekerja_rows if cocok(r["skill"] or "") or cocok(r["deskripsi_skill"] or "") or cocok(r["dukungan"] or "")]
+            peluang_irt = [dict(r) for r in irt_rows if cocok(r["bidang_minat"] or "") or cocok(r["spesifik_bidang"] or "") or cocok(r["perlu_grup"] or "")]
+            return peluang_bisnis, peluang_pekerja, peluang_irt
+
+        if deadline:
+            peluang_bisnis, peluang_pekerja, peluang_irt = await deadline.opsional("peluang", ambil_peluang(), ([], [], []))
+            # Panggil fungsi baru untuk mencari top 5 alumni kolaborasi
+            top_alumni_kolaborasi = await deadline.opsional(
+                "kolaborasi", cari_top_alumni_kolaborasi(alumni_id, current_alumni_full_profile_text), [])
+        else:
+            peluang_bisnis, peluang_pekerja, peluang_irt = await ambil_peluang()
+            top_alumni_kolaborasi = await cari_top_alumni_kolaborasi(alumni_id, current_alumni_full_profile_text)
 
         return {
             "nama": row["nama_lengkap"],
@@ -211,9 +460,13 @@ async def ambil_profil_alumni(nama_lengkap: str):
             "top_alumni_kolaborasi": top_alumni_kolaborasi
         }
     finally:
-        await conn.close() 
+        await db.tutup_koneksi(conn) 
 
-def build_prompt(data, language):
+def bagian_prompt(data, language):
+    """
+    Menyusun prompt rekomendasi sebagai (konteks, judul instruksi, daftar instruksi bernomor, penutup)
+    agar bisa digabung menjadi satu prompt atau dipecah per bagian.
+    """
     top_alumni_kolaborasi_content = ""
     if data['top_alumni_kolaborasi']:
         if language.lower() == "id":
@@ -288,7 +541,7 @@ def build_prompt(data, language):
     # --- END PERBAIKAN FORMAT DETAIL AKTIVITAS ---
 
 
-    bahasa_id = (
+    konteks_id = (
         f"Profil Alumni:\n"
         f"Nama Lengkap: {data['nama']}\n"
         f"Nama Panggilan: {data['nama_panggilan']}\n"
@@ -302,17 +555,18 @@ def build_prompt(data, language):
         f"- Alumni IRT: {data['peluang_irt']}\n\n"
         # Memindahkan informasi top alumni sebagai konteks, bukan instruksi output bernomor
         f"{top_alumni_kolaborasi_content}\n\n" 
-        f"Silakan berikan:\n"
-        f"1. Ringkasan profil {data['nama_panggilan']}. Sertakan semua aktivitas dan detail relevan yang digabungkan.\n" # Perjelas instruksi
+    )
+    instruksi_id = [
+        f"1. Ringkasan profil {data['nama_panggilan']}. Sertakan semua aktivitas dan detail relevan yang digabungkan.\n", # Perjelas instruksi
         f"2. Analisis peluang kolaborasi yang sesuai keahlian {data['nama_panggilan']}. "
         f"Untuk setiap peluang (baik dari alumni bisnis, pekerja, atau IRT), jelaskan bagaimana profil {data['nama_panggilan']} cocok dengan kebutuhan tersebut. " 
-        f"Kemudian, identifikasi dan sebutkan nama-nama alumni dari daftar 'profil alumni lain yang paling cocok untuk kolaborasi' yang paling relevan untuk setiap peluang tersebut, serta jelaskan bagaimana mereka dapat terlibat.\n" 
-        f"3. Rekomendasi nyata dan profesional untuk kolaborasi atau pengembangan karir berdasarkan data alumni lainnya.\n"
-        f"4. Tampilkan minimal 5 contoh **judul atau nama proyek** kolaborasi yang konkrit dan realistis berdasarkan data peluang dari alumni lain dan alumni yang telah Anda ringkas profilnya (sebutkan nama mereka jika relevan), yang bisa dikerjakan bersama {data['nama_panggilan']}.\n"
-        f"Tolong gunakan bahasa yang jelas dan profesional. Pastikan untuk selalu merujuk pada alumni utama dengan **nama panggilannya** ({data['nama_panggilan']}) saja, tanpa prefiks 'alumni' atau 'bapak/ibu'."
-    )
+        f"Kemudian, identifikasi dan sebutkan nama-nama alumni dari daftar 'profil alumni lain yang paling cocok untuk kolaborasi' yang paling relevan untuk setiap peluang tersebut, serta jelaskan bagaimana mereka dapat terlibat.\n",
+        f"3. Rekomendasi nyata dan profesional untuk kolaborasi atau pengembangan karir berdasarkan data alumni lainnya.\n",
+        f"4. Tampilkan minimal 5 contoh **judul atau nama proyek** kolaborasi yang konkrit dan realistis berdasarkan data peluang dari alumni lain dan alumni yang telah Anda ringkas profilnya (sebutkan nama mereka jika relevan), yang bisa dikerjakan bersama {data['nama_panggilan']}.\n",
+    ]
+    penutup_id = f"Tolong gunakan bahasa yang jelas dan profesional. Pastikan untuk selalu merujuk pada alumni utama dengan **nama panggilannya** ({data['nama_panggilan']}) saja, tanpa prefiks 'alumni' atau 'bapak/ibu'."
 
-    bahasa_en = (
+    konteks_en = (
         f"Alumni Profile:\n"
         f"Full Name: {data['nama']}\n"
         f"Nickname: {data['nama_panggilan']}\n"
@@ -326,52 +580,289 @@ def build_prompt(data, language):
         f"- Homemaker Alumni: {data['peluang_irt']}\n\n"
         # Memindahkan informasi top alumni sebagai konteks, bukan instruksi output bernomor
         f"{top_alumni_kolaborasi_content}\n\n" 
-        f"Please provide:\n"
-        f"1. A brief profile summary for {data['nama_panggilan']}.\n"
+    )
+    instruksi_en = [
+        f"1. A brief profile summary for {data['nama_panggilan']}.\n",
         f"2. Analysis of collaboration opportunities relevant to {data['nama_panggilan']}'s skills. "
         f"For each opportunity (from business, worker, or homemaker alumni), explain how {data['nama_panggilan']}'s profile matches those needs. " 
-        f"Then, identify and mention the names of alumni from the 'most suitable alumni profiles for collaboration' list who are most relevant for each opportunity, and explain how they can be involved.\n" 
-        f"3. Practical, professional recommendations for collaboration or career advancement based on alumni data.\n"
-        f"4. Present at least 5 **concrete and realistic project titles** or collaboration themes derived from available alumni data and the summarized alumni (mention their names if relevant), that {data['nama_panggilan']} could join.\n"
-        f"Please use clear and professional language. Always refer to the main alumni by their **nickname** ({data['nama_panggilan']}) only, without prefixes like 'alumni' or 'Mr./Ms.'."
-    )
+        f"Then, identify and mention the names of alumni from the 'most suitable alumni profiles for collaboration' list who are most relevant for each opportunity, and explain how they can be involved.\n",
+        f"3. Practical, professional recommendations for collaboration or career advancement based on alumni data.\n",
+        f"4. Present at least 5 **concrete and realistic project titles** or collaboration themes derived from available alumni data and the summarized alumni (mention their names if relevant), that {data['nama_panggilan']} could join.\n",
+    ]
+    penutup_en = f"Please use clear and professional language. Always refer to the main alumni by their **nickname** ({data['nama_panggilan']}) only, without prefixes like 'alumni' or 'Mr./Ms.'."
 
-    return bahasa_en if language.lower() == "en" else bahasa_id
+    if language.lower() == "en":
+        return konteks_en, "Please provide:\n", instruksi_en, penutup_en
+    return konteks_id, "Silakan berikan:\n", instruksi_id, penutup_id
 
-@app.post("/rekomendasi")
-async def rekomendasi(input: RekomendasiInput):
-    try:
-        data = await ambil_profil_alumni(input.nama_lengkap)
-        prompt = build_prompt(data, input.language)
+def build_prompt(data, language):
+    konteks, judul_instruksi, instruksi, penutup = bagian_prompt(data, language)
+    return konteks + judul_instruksi + "".join(instruksi) + penutup
 
-        headers = {
-            "Content-Type": "application/json"
-        }
-        # Tambahkan API Key ke URL untuk Gemini
-        gemini_api_url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent?key={GEMINI_API_KEY}"
-
-        system_content = {
-            "id": "Kamu adalah asisten cerdas yang memberikan saran karir dan kolaborasi alumni dalam bahasa Indonesia yang profesional.",
-            "en": "You are a smart assistant providing alumni career and kolaborasi suggestions in fluent English."
-        }.get(input.language.lower(), "Kamu adalah asisten cerdas yang memberikan saran karir dan kolaborasi alumni dalam bahasa Indonesia.")
-
-        body = {
-            "contents": [
-                {"role": "user", "parts": [{"text": system_content + "\n\n" + prompt}]}
-            ],
-            "generationConfig": {
-                "temperature": 0.7,
-                "maxOutputTokens": 2500 
-            }
+async def panggil_gemini(system_content: str, prompt: str, max_output_tokens: int = 2500, timeout: float = 90.0,
+                         generation_config: dict = None, usage: dict = None) -> str:
+    """
+    Mengirim satu prompt ke Gemini dan mengembalikan teks jawabannya. `generation_config`
+    ditambahkan ke generationConfig; jika `usage` diberikan, jumlah panggilan dan token output
+    (usageMetadata.candidatesTokenCount) ditambahkan ke dict tersebut.
+    """
+    headers = {
+        "Content-Type": "application/json"
+    }
+    # Tambahkan API Key ke URL untuk Gemini
+    gemini_api_url = f"{GEMINI_API_BASE}/v1beta/models/gemini-2.0-flash:generateContent?key={GEMINI_API_KEY}"
+
+    body = {
+        "contents": [
+            {"role": "user", "parts": [{"text": system_content + "\n\n" + prompt}]}
+        ],
+        "generationConfig": {
+            "temperature": 0.7,
+            "maxOutputTokens": max_output_tokens,
+            **(generation_config or {})
         }
-        
-        async with httpx.AsyncClient(timeout=90.0) as client:
+    }
+
+    if _http_client is not None:
+        res = await _http_client.post(gemini_api_url, headers=headers, json=body, timeout=timeout)
+    else:
+        async with httpx.AsyncClient(timeout=timeout) as client:
             res = await client.post(gemini_api_url, headers=headers, json=body)
-            res.raise_for_status()
-            # Parsing respons Gemini API
-            content = res.json()["candidates"][0]["content"]["parts"][0]["text"]
-            return {"rekomendasi": content.strip()}
+    res.raise_for_status()
+    # Parsing respons Gemini API
+    respons = res.json()
+    if usage is not None:
+        usage["panggilan"] += 1
+        usage["token_output"] += respons.get("usageMetadata", {}).get("candidatesTokenCount", 0)
+    content = respons["candidates"][0]["content"]["parts"][0]["text"]
+    return content.strip()
+
+def batas_gemini(deadline: Deadline, max_output_tokens: int):
+    """
+    Menghitung (max_output_tokens, timeout) untuk Gemini sesuai sisa deadline.
+    """
+    if deadline is None:
+        return max_output_tokens, 90.0
+    if deadline.sisa() <= 1.0:
+        raise HTTPException(status_code=504, detail="Batas waktu request habis sebelum rekomendasi dibuat.")
+    return deadline.max_output_tokens(max_output_tokens), min(90.0, deadline.sisa())
+
+# Cache hasil per bagian: kunci -> (waktu dibuat, teks)
+_cache_bagian = OrderedDict()
+
+def _bisa_ulang(percobaan: int, deadline: Deadline = None) -> bool:
+    # Retry hanya jika setelah jeda masih ada waktu untuk satu panggilan lagi (batas batas_gemini)
+    if percobaan == LLM_RETRIES:
+        return False
+    return deadline is None or deadline.sisa() - 0.5 * 2 ** percobaan > 1.0
+
+async def panggil_gemini_cache(system_content: str, prompt: str, max_output_tokens: int, deadline: Deadline = None, usage: dict = None) -> str:
+    """
+    panggil_gemini dengan cache in-memory dan retry untuk error sementara. Batas token dan
+    timeout dihitung ulang dari sisa deadline pada setiap percobaan.
+    """
+    kunci = hashlib.sha256(f"{system_content}\0{prompt}\0{max_output_tokens}".encode("utf-8")).hexdigest()
+    entry = _cache_bagian.get(kunci)
+    if entry and time.time() - entry[0] < SECTION_CACHE_TTL:
+        _cache_bagian.move_to_end(kunci)
+        return entry[1]
+
+    for percobaan in range(LLM_RETRIES + 1):
+        token, timeout = batas_gemini(deadline, max_output_tokens)
+        try:
+            content = await panggil_gemini(system_content, prompt, token, timeout, usage=usage)
+            break
+        except httpx.HTTPStatusError as e:
+            if not _bisa_ulang(percobaan, deadline) or e.response.status_code not in (429, 500, 502, 503, 504):
+                raise
+        except httpx.TimeoutException:
+            raise # Timeout sudah dibatasi deadline, mengulang hanya memperpanjang request
+        except httpx.TransportError:
+            if not _bisa_ulang(percobaan, deadline):
+                raise
+        await asyncio.sleep(0.5 * 2 ** percobaan)
+
+    # Hasil yang tokennya dipangkas deadline tidak disimpan agar request lain tidak menerima teks terpotong
+    if token == max_output_tokens:
+        _cache_bagian[kunci] = (time.time(), content)
+        while len(_cache_bagian) > SECTION_CACHE_SIZE:
+            _cache_bagian.popitem(last=False)
+    return content
+
+# Budget token per bagian untuk mode sectioned, urut sesuai instruksi bernomor di prompt
+BUDGET_BAGIAN_REKOMENDASI = [500, 900, 600, 600]
+BUDGET_BAGIAN_PROYEK = [400, 400, 1500, 200]
+
+JUDUL_BAGIAN = {
+    "id": "Berikan HANYA bagian berikut (bagian lain dibuat terpisah, jangan diulang):\n",
+    "en": "Provide ONLY the following section (the other sections are generated separately, do not repeat them):\n",
+}
+
+async def generate_bersekat(system_content: str, bagian, budget, language: str, deadline: Deadline = None, usage: dict = None) -> str:
+    """
+    Membuat tiap bagian bernomor dengan panggilan Gemini terpisah yang berjalan paralel,
+    lalu menggabungkannya sesuai urutan. Latensi mengikuti bagian paling lambat.
+    """
+    konteks, _, instruksi, penutup = bagian
+    judul = JUDUL_BAGIAN["en" if language.lower() == "en" else "id"]
+    tugas = [
+        asyncio.create_task(panggil_gemini_cache(system_content, konteks + judul + teks_instruksi + penutup, max_output_tokens, deadline, usage))
+        for teks_instruksi, max_output_tokens in zip(instruksi, budget)
+    ]
+    try:
+        hasil = await asyncio.gather(*tugas)
+    except Exception:
+        # Satu bagian gagal -> seluruh respons gagal; hentikan bagian lain agar tidak terus memakai kuota
+        for t in tugas:
+            t.cancel()
+        raise
+    return "\n\n".join(h for h in hasil if h)
+
+# Statistik generasi per "jenis:mode", untuk membandingkan token output antar mode
+_statistik_generasi = {}
+
+def usage_baru() -> dict:
+    return {"panggilan": 0, "token_output": 0, "output_tidak_valid": 0, "fallback": 0}
+
+def catat_generasi(jenis: str, mode: str, usage: dict):
+    statistik = _statistik_generasi.setdefault(f"{jenis}:{mode}", {"permintaan": 0, **usage_baru()})
+    statistik["permintaan"] += 1
+    for k, v in usage.items():
+        statistik[k] += v
+
+def ringkasan_generasi():
+    """
+    Statistik per mode beserta rata-rata token output per permintaan, dan penghematan mode
+    ringkas dibanding mode bebas (single) untuk jenis yang sama.
+    """
+    per_mode = {
+        kunci: {**s, "rata_token_output": round(s["token_output"] / s["permintaan"], 1) if s["permintaan"] else 0}
+        for kunci, s in _statistik_generasi.items()
+    }
+    penghematan = {}
+    for jenis in ("rekomendasi", "proyek"):
+        bebas, hemat = per_mode.get(f"{jenis}:single"), per_mode.get(f"{jenis}:ringkas")
+        if bebas and hemat and bebas["rata_token_output"]:
+            penghematan[jenis] = round(1 - hemat["rata_token_output"] / bebas["rata_token_output"], 3)
+    return {"per_mode": per_mode, "penghematan_token_output": penghematan}
+
+async def generate_ringkas(system_content: str, prompt: str, skema, max_output_tokens: int, deadline: Deadline, usage: dict):
+    """
+    Meminta JSON sesuai skema lalu memvalidasinya; output yang rusak diulang hingga
+    RINGKAS_RETRIES kali. Mengembalikan objek jawaban, atau None jika semua percobaan gagal
+    atau skema ditolak Gemini (HTTP 400).
+    """
+    generation_config = {"responseMimeType": "application/json", "responseSchema": skema}
+    for percobaan in range(ringkas.RINGKAS_RETRIES + 1):
+        tokens, timeout = batas_gemini(deadline, max_output_tokens)
+        try:
+            teks = await panggil_gemini(system_content, prompt, tokens, timeout, generation_config, usage)
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code != 400:
+                raise
+            # Skema ditolak API (misalnya terlalu besar): ulangi tidak akan membantu, pakai generasi bebas
+            logger.warning("Gemini menolak responseSchema mode ringkas: %s", e.response.text[:500])
+            return None
+        try:
+            return ringkas.parse(teks, skema)
+        except ringkas.OutputTidakValid as e:
+            usage["output_tidak_valid"] += 1
+            logger.warning("Output mode ringkas tidak valid (percobaan %d): %s", percobaan + 1, e)
+    return None
+
+async def generate_rekomendasi(data, language: str, deadline: Deadline = None, mode: str = None) -> str:
+    system_content = {
+        "id": "Kamu adalah asisten cerdas yang memberikan saran karir dan kolaborasi alumni dalam bahasa Indonesia yang profesional.",
+        "en": "You are a smart assistant providing alumni career and kolaborasi suggestions in fluent English."
+    }.get(language.lower(), "Kamu adalah asisten cerdas yang memberikan saran karir dan kolaborasi alumni dalam bahasa Indonesia.")
+    mode = mode or GENERATION_MODE
+    usage = usage_baru()
+    content = None
+    if mode == "ringkas":
+        skema = ringkas.skema_rekomendasi(data)
+        prompt = ringkas.prompt_rekomendasi(bagian_prompt(data, language)[0], data, language)
+        jawaban = await generate_ringkas(system_content, prompt, skema, ringkas.RINGKAS_MAX_TOKENS_REKOMENDASI, deadline, usage)
+        if jawaban is not None:
+            content = ringkas.render_rekomendasi(data, jawaban, language)
+        else:
+            # Semua percobaan JSON gagal: layani dengan generasi bebas agar request tetap berhasil
+            usage["fallback"] += 1
+    elif mode == "sectioned":
+        content = await generate_bersekat(system_content, bagian_prompt(data, language), BUDGET_BAGIAN_REKOMENDASI, language, deadline, usage)
+    if content is None:
+        max_output_tokens, timeout = batas_gemini(deadline, 2500)
+        content = await panggil_gemini(system_content, build_prompt(data, language), max_output_tokens, timeout, usage=usage)
+    catat_generasi("rekomendasi", mode, usage)
+    return content
+
+async def regenerasi_rekomendasi(nama_lengkap: str, language: str, paksa: bool = False) -> bool:
+    """
+    Menghitung ulang input rekomendasi dan memanggil Gemini hanya jika hash input berubah
+    (atau paksa=True). Mengembalikan True jika hasil baru disimpan; hasil tersimpan untuk
+    alumni yang sudah dihapus ikut dihapus.
+    """
+    k = precompute.kunci(nama_lengkap, language)
+    try:
+        data = await ambil_profil_alumni(nama_lengkap)
+    except HTTPException as e:
+        if e.status_code != 404:
+            raise
+        # Alumni sudah dihapus: buang hasil tersimpan agar tidak terus disajikan
+        await precompute.hapus(k)
+        return False
+    prompt = build_prompt(data, language)
+    h = precompute.hash_input(prompt, GENERATION_MODE)
+    entry = await precompute.ambil(k)
+    if entry and entry["hash_input"] == h and not paksa:
+        await precompute.tandai_diperiksa(k)
+        return False
+    await precompute.simpan(k, h, await generate_rekomendasi(data, language))
+    return True
+
+async def ambil_semua_nama_alumni():
+    conn = await db.buka_koneksi()
+    try:
+        rows = await conn.fetch("SELECT nama_lengkap FROM alumni_db ORDER BY id")
+        return [r["nama_lengkap"] for r in rows]
+    finally:
+        await db.tutup_koneksi(conn)
+
+async def rekomendasi_tersimpan(nama_lengkap: str, language: str):
+    """
+    (hash_input, body) dari hasil prakomputasi, atau None jika belum ada. Hasil tersimpan
+    disajikan apa adanya; perubahan data dicek di background (stale-while-revalidate).
+    """
+    k = precompute.kunci(nama_lengkap, language)
+    entry = await precompute.ambil(k)
+    if entry is None:
+        return None
+    precompute.revalidasi_jika_perlu(k, entry, lambda: regenerasi_rekomendasi(nama_lengkap, language))
+    return entry["hash_input"], {"rekomendasi": entry["hasil"], "dihasilkan_pada": entry["dibuat"], "degradasi": []}
+
+@app.post("/rekomendasi")
+@diprofil("rekomendasi")
+async def rekomendasi(input: RekomendasiInput, request: Request):
+    catat_request("/rekomendasi", input.dict())
+    try:
+        k = precompute.kunci(input.nama_lengkap, input.language)
+        if precompute.PRECOMPUTE_ENABLED:
+            tersimpan = await rekomendasi_tersimpan(input.nama_lengkap, input.language)
+            if tersimpan is not None:
+                return tersimpan[1]
+
+        deadline = Deadline.dari_request(request)
+        data = await ambil_profil_alumni(input.nama_lengkap, deadline)
+        prompt = build_prompt(data, input.language)
+        content = await generate_rekomendasi(data, input.language, deadline)
+        if precompute.PRECOMPUTE_ENABLED and not deadline.degradasi:
+            # Hanya hasil lengkap yang disimpan; hasil terdegradasi akan dibuat ulang pada request berikutnya
+            await precompute.simpan(k, precompute.hash_input(prompt, GENERATION_MODE), content)
+        return {"rekomendasi": content, "degradasi": deadline.degradasi}
 
+    except HTTPException as e:
+        raise e # Re-raise HTTPExceptions (e.g., 404 alumni tidak ditemukan)
+    except httpx.TimeoutException:
+        raise HTTPException(status_code=504, detail="Gemini tidak selesai sebelum batas waktu request.")
     except Exception as e:
         # Menambahkan detail traceback ke respons error untuk debugging yang lebih baik
         error_traceback = traceback.format_exc()
@@ -379,14 +870,50 @@ async def rekomendasi(input: RekomendasiInput):
 
 # --- START ENDPOINT DAN LOGIKA REKOMENDASI PROYEK BARU ---
 
-async def cari_alumni_untuk_proyek(project_text: str):
+async def cari_alumni_untuk_proyek(project_text: str, mode: str = None):
     """
     Mencari hingga 10 alumni yang paling relevan untuk suatu proyek
     berdasarkan deskripsi proyek.
     """
-    conn = await asyncpg.connect(SUPABASE_DB_URL, statement_cache_size=0)
+    if (mode or SEARCH_MODE) == "indeks":
+        indeks = await indeks_profil.dapatkan()
+        hasil = []
+        for match_score, posisi in await skoring.top_k_async(indeks, set(project_text.lower().split()), 10):
+            alumni = indeks.alumni_pada(posisi)
+            hasil.append({
+                "id": alumni["id"],
+                "nama_lengkap": alumni["nama_lengkap"],
+                "aktivitas": alumni["aktivitas"],
+                "skills_gabungan": alumni["skill_gabungan"],
+                "full_profile_text": alumni["teks"],
+                "match_score": match_score
+            })
+        return hasil
+
+    conn = await db.buka_koneksi()
     
     try:
+        if (mode or SEARCH_MODE) == "db":
+            rows = await cari_kandidat_db(conn, project_text, 10)
+            return [{
+                "id": r["id"],
+                "nama_lengkap": r["nama_lengkap"],
+                "aktivitas": r["aktivitas"],
+                "skills_gabungan": r["skill_gabungan"] or "",
+                "full_profile_text": r["dokumen"],
+                "match_score": r["skor"]
+            } for r in rows]
+
+        if (mode or SEARCH_MODE) == "stream":
+            return [{
+                "id": alumni["id"],
+                "nama_lengkap": alumni["nama_lengkap"],
+                "aktivitas": alumni["aktivitas"],
+                "skills_gabungan": alumni["skill_gabungan"],
+                "full_profile_text": alumni["teks"],
+                "match_score": match_score
+            } for match_score, alumni in await scan_kandidat_stream(conn, set(project_text.lower().split()), 10)]
+
         # Ambil semua alumni dari alumni_db
         all_alumni_general = await conn.fetch(
             "SELECT id, nama_lengkap, aktivitas, skill_gabungan FROM alumni_db"
@@ -436,6 +963,7 @@ async def cari_alumni_untuk_proyek(project_text: str):
             
             if match_score > 0:
                 alumni_candidates.append({
+                    "id": alumni_id,
                     "nama_lengkap": alumni_nama,
                     "aktivitas": alumni_aktivitas_gabungan,
                     "skills_gabungan": alumni_skills_gabungan,
@@ -447,12 +975,12 @@ async def cari_alumni_untuk_proyek(project_text: str):
         alumni_candidates.sort(key=lambda x: x['match_score'], reverse=True)
         return alumni_candidates[:10] # Batasi hingga 10 alumni
     finally:
-        await conn.close()
+        await db.tutup_koneksi(conn)
 
 
-def build_proyek_prompt(proyek_input_data, recommended_alumni, language):
+def bagian_proyek_prompt(proyek_input_data, recommended_alumni, language):
     """
-    Membangun prompt untuk LLM berdasarkan ide proyek dan alumni yang direkomendasikan.
+    Menyusun bagian-bagian prompt proyek: (konteks, judul instruksi, daftar instruksi bernomor, penutup).
     """
     proyek_info = ""
     # Menggunakan input.ide_proyek langsung sebagai deskripsi proyek
@@ -474,120 +1002,346 @@ def build_proyek_prompt(proyek_input_data, recommended_alumni, language):
     else:
         alumni_list_content = "Tidak ada alumni yang relevan ditemukan di database untuk proyek ini." if language.lower() == "id" else "No relevant alumni found in the database for this project."
 
-    bahasa_id = (
+    konteks_id = (
         f"Anda adalah asisten cerdas yang bertugas merekomendasikan talenta alumni untuk sebuah proyek. "
         f"Berikut adalah informasi proyek yang diajukan:\n"
         f"{proyek_info}\n"
         f"{alumni_list_content}\n\n" # Informasi alumni ditempatkan sebagai konteks umum
-        f"Silakan berikan:\n"
-        f"1. Deskripsi ringkas gambaran proyeknya dan kebutuhannya.\n"
-        f"2. Analisis singkat tentang kebutuhan talenta untuk proyek ini berdasarkan deskripsi proyek.\n"
-        f"3. Rekomendasikan hingga 10 alumni dari daftar yang **telah disediakan di atas** yang paling cocok untuk proyek ini, dan untuk setiap alumni, tentukan **peran spesifik** yang bisa mereka berikan dalam proyek tersebut (misalnya, \"Lead Data Analyst\", \"Konsultan Bisnis\", \"Content Creator Media Sosial\"), dan berikan **justifikasi singkat** mengapa mereka cocok untuk peran tersebut berdasarkan keahlian dan aktivitas mereka. Sajikan ini dalam format **daftar poin (bulleted list)** yang jelas.\n" # Diubah ke format daftar poin
-        f"4. Selesaikan respons Anda dengan pesan penutup yang profesional."
-        f"Tolong gunakan bahasa yang jelas, profesional, dan fokus pada peran yang konkret. Pastikan formatnya adalah daftar poin yang rapi."
     )
-
-    bahasa_en = (
+    instruksi_id = [
+        f"1. Deskripsi ringkas gambaran proyeknya dan kebutuhannya.\n",
+        f"2. Analisis singkat tentang kebutuhan talenta untuk proyek ini berdasarkan deskripsi proyek.\n",
+        f"3. Rekomendasikan hingga 10 alumni dari daftar yang **telah disediakan di atas** yang paling cocok untuk proyek ini, dan untuk setiap alumni, tentukan **peran spesifik** yang bisa mereka berikan dalam proyek tersebut (misalnya, \"Lead Data Analyst\", \"Konsultan Bisnis\", \"Content Creator Media Sosial\"), dan berikan **justifikasi singkat** mengapa mereka cocok untuk peran tersebut berdasarkan keahlian dan aktivitas mereka. Sajikan ini dalam format **daftar poin (bulleted list)** yang jelas.\n", # Diubah ke format daftar poin
+        f"4. Selesaikan respons Anda dengan pesan penutup yang profesional.",
+    ]
+    penutup_id = "Tolong gunakan bahasa yang jelas, profesional, dan fokus pada peran yang konkret. Pastikan formatnya adalah daftar poin yang rapi."
+
+    konteks_en = (
         f"You are a smart assistant tasked with recommending alumni talent for a project. "
         f"Here is the submitted project information:\n"
         f"{proyek_info}\n"
         f"{alumni_list_content}\n\n" # Alumni info placed as general context
-        f"Please provide:\n"
-        f"1. A brief overview of the project and its needs.\n"
-        f"2. A brief analysis of the talent needs for this project based on the project description.\n"
-        f"3. Recommend up to 10 alumni from the list **provided above** who are most suitable for this project, and for each alumni, specify their **potential role** in the project (e.g., \"Lead Data Analyst\", \"Business Consultant\", \"Social Media Content Creator\"), and provide a **brief justification** for why they are suitable for that role based on their skills and activities. Present this in a **clear bulleted list format**.\n" # Changed to bulleted list format
-        f"4. Conclude your response with a professional closing message."
-        f"Please use clear, professional language, and focus on concrete roles. Ensure the output is a neat bulleted list."
     )
+    instruksi_en = [
+        f"1. A brief overview of the project and its needs.\n",
+        f"2. A brief analysis of the talent needs for this project based on the project description.\n",
+        f"3. Recommend up to 10 alumni from the list **provided above** who are most suitable for this project, and for each alumni, specify their **potential role** in the project (e.g., \"Lead Data Analyst\", \"Business Consultant\", \"Social Media Content Creator\"), and provide a **brief justification** for why they are suitable for that role based on their skills and activities. Present this in a **clear bulleted list format**.\n", # Changed to bulleted list format
+        f"4. Conclude your response with a professional closing message.",
+    ]
+    penutup_en = "Please use clear, professional language, and focus on concrete roles. Ensure the output is a neat bulleted list."
+
+    if language.lower() == "en":
+        return konteks_en, "Please provide:\n", instruksi_en, penutup_en
+    return konteks_id, "Silakan berikan:\n", instruksi_id, penutup_id
 
-    return bahasa_en if language.lower() == "en" else bahasa_id
-
-@app.post("/rekomendasi")
-async def rekomendasi(input: RekomendasiInput):
-    try:
-        data = await ambil_profil_alumni(input.nama_lengkap)
-        prompt = build_prompt(data, input.language)
-
-        headers = {
-            "Content-Type": "application/json"
-        }
-        # Tambahkan API Key ke URL untuk Gemini
-        gemini_api_url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent?key={GEMINI_API_KEY}"
-
-        system_content = {
-            "id": "Kamu adalah asisten cerdas yang memberikan saran karir dan kolaborasi alumni dalam bahasa Indonesia yang profesional.",
-            "en": "You are a smart assistant providing alumni career and kolaborasi suggestions in fluent English."
-        }.get(input.language.lower(), "Kamu adalah asisten cerdas yang memberikan saran karir dan kolaborasi alumni dalam bahasa Indonesia.")
-
-        body = {
-            "contents": [
-                {"role": "user", "parts": [{"text": system_content + "\n\n" + prompt}]}
-            ],
-            "generationConfig": {
-                "temperature": 0.7,
-                "maxOutputTokens": 2500 
-            }
-        }
-        
-        async with httpx.AsyncClient(timeout=90.0) as client:
-            res = await client.post(gemini_api_url, headers=headers, json=body)
-            res.raise_for_status()
-            # Parsing respons Gemini API
-            content = res.json()["candidates"][0]["content"]["parts"][0]["text"]
-            return {"rekomendasi": content.strip()}
-
-    except Exception as e:
-        # Menambahkan detail traceback ke respons error untuk debugging yang lebih baik
-        error_traceback = traceback.format_exc()
-        raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}\n\nTraceback:\n{error_traceback}")
+def build_proyek_prompt(proyek_input_data, recommended_alumni, language):
+    """
+    Membangun prompt untuk LLM berdasarkan ide proyek dan alumni yang direkomendasikan.
+    """
+    konteks, judul_instruksi, instruksi, penutup = bagian_proyek_prompt(proyek_input_data, recommended_alumni, language)
+    return konteks + judul_instruksi + "".join(instruksi) + penutup
+
+async def generate_proyek(input: ProyekInput, recommended_alumni_data, language: str, deadline: Deadline = None, mode: str = None) -> str:
+    system_content = {
+        "id": "Kamu adalah asisten cerdas yang memberikan rekomendasi talenta alumni dan peran spesifik mereka untuk proyek yang diberikan.",
+        "en": "You are a smart assistant providing alumni talent recommendations and their specific roles for a given project."
+    }.get(language.lower(), "Kamu adalah asisten cerdas yang memberikan rekomendasi talenta alumni dan peran spesifik mereka untuk proyek yang diberikan.")
+    mode = mode or GENERATION_MODE
+    usage = usage_baru()
+    content = None
+    if mode == "ringkas":
+        skema = ringkas.skema_proyek(recommended_alumni_data)
+        konteks = bagian_proyek_prompt(input, recommended_alumni_data, language)[0]
+        prompt = ringkas.prompt_proyek(konteks, recommended_alumni_data, language)
+        jawaban = await generate_ringkas(system_content, prompt, skema, ringkas.RINGKAS_MAX_TOKENS_PROYEK, deadline, usage)
+        if jawaban is not None:
+            content = ringkas.render_proyek(input.ide_proyek, recommended_alumni_data, jawaban, language)
+        else:
+            usage["fallback"] += 1
+    elif mode == "sectioned":
+        bagian = bagian_proyek_prompt(input, recommended_alumni_data, language)
+        content = await generate_bersekat(system_content, bagian, BUDGET_BAGIAN_PROYEK, language, deadline, usage)
+    if content is None:
+        # Bangun prompt untuk LLM
+        # Mengirimkan ProyekInput langsung ke build_proyek_prompt
+        prompt = build_proyek_prompt(input, recommended_alumni_data, language)
+        # 2500 token cukup untuk daftar 10 alumni dengan peran dan justifikasi
+        max_output_tokens, timeout = batas_gemini(deadline, 2500)
+        content = await panggil_gemini(system_content, prompt, max_output_tokens, timeout, usage=usage)
+    catat_generasi("proyek", mode, usage)
+    return content
 
 # --- START ENDPOINT DAN LOGIKA REKOMENDASI PROYEK BARU ---
 
 @app.post("/proyek_rekomendasi")
-async def proyek_rekomendasi(input: ProyekInput):
+@diprofil("proyek_rekomendasi")
+async def proyek_rekomendasi(input: ProyekInput, request: Request):
+    catat_request("/proyek_rekomendasi", input.dict())
     try:
         # Menggunakan ide_proyek langsung sebagai project_text
         project_text = input.ide_proyek.strip()
         if not project_text: # ide_proyek tidak boleh kosong
             raise HTTPException(status_code=400, detail="Ide proyek tidak boleh kosong.")
 
-        # Cari alumni yang relevan untuk proyek
-        recommended_alumni_data = await cari_alumni_untuk_proyek(project_text)
-        
-        # Bangun prompt untuk LLM
-        # Mengirimkan ProyekInput langsung ke build_proyek_prompt
-        prompt = build_proyek_prompt(input, recommended_alumni_data, input.language)
+        deadline = Deadline.dari_request(request)
 
-        headers = {
-            "Content-Type": "application/json"
-        }
-        gemini_api_url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent?key={GEMINI_API_KEY}"
-
-        system_content = {
-            "id": "Kamu adalah asisten cerdas yang memberikan rekomendasi talenta alumni dan peran spesifik mereka untuk proyek yang diberikan.",
-            "en": "You are a smart assistant providing alumni talent recommendations and their specific roles for a given project."
-        }.get(input.language.lower(), "Kamu adalah asisten cerdas yang memberikan rekomendasi talenta alumni dan peran spesifik mereka untuk proyek yang diberikan.")
-
-        body = {
-            "contents": [
-                {"role": "user", "parts": [{"text": system_content + "\n\n" + prompt}]}
-            ],
-            "generationConfig": {
-                "temperature": 0.7,
-                "maxOutputTokens": 2500 # Cukup untuk daftar 10 alumni dengan peran dan justifikasi
-            }
-        }
+        # Cari alumni yang relevan untuk proyek (wajib, dibatasi sisa deadline)
+        try:
+            recommended_alumni_data = await asyncio.wait_for(cari_alumni_untuk_proyek(project_text), timeout=deadline.sisa())
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=504, detail="Batas waktu request habis saat mencari alumni.")
         
-        async with httpx.AsyncClient(timeout=90.0) as client: # Timeout untuk LLM
-            res = await client.post(gemini_api_url, headers=headers, json=body)
-            res.raise_for_status()
-            content = res.json()["candidates"][0]["content"]["parts"][0]["text"]
-            return {"rekomendasi_proyek": content.strip()}
+        content = await generate_proyek(input, recommended_alumni_data, input.language, deadline)
+        return {"rekomendasi_proyek": content, "degradasi": deadline.degradasi}
 
     except HTTPException as e:
         raise e # Re-raise HTTPExceptions (e.g., 400 or 404)
+    except httpx.TimeoutException:
+        raise HTTPException(status_code=504, detail="Gemini tidak selesai sebelum batas waktu request.")
     except Exception as e:
         error_traceback = traceback.format_exc()
         raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}\n\nTraceback:\n{error_traceback}")
 
 # --- END FITUR REKOMENDASI PROYEK BARU ---
+
+# --- VARIAN GET DENGAN ETAG ---
+
+# Representasi yang sudah dikirim per ETag: etag -> body
+_cache_etag = OrderedDict()
+
+def buat_etag(*bagian: str) -> str:
+    return '"' + hashlib.sha256("\0".join(bagian).encode("utf-8")).hexdigest()[:32] + '"'
+
+def etag_cocok(if_none_match: str, etag: str) -> bool:
+    # If-None-Match memakai perbandingan lemah, prefiks W/ diabaikan
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(t.strip().removeprefix("W/") == etag for t in if_none_match.split(","))
+
+async def respons_dengan_etag(request: Request, etag: str, cache_control: str, hasilkan):
+    """
+    304 jika If-None-Match cocok dengan etag. Jika tidak, kirim representasi yang tersimpan untuk
+    etag ini atau hasil baru dari `hasilkan` (fungsi tanpa argumen yang mengembalikan coroutine).
+    Hasil terdegradasi dan hasil prakomputasi (bisa berasal dari data lama) tidak diberi ETag
+    dan tidak boleh di-cache.
+    """
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if etag_cocok(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    body = _cache_etag.get(etag)
+    if body is not None:
+        _cache_etag.move_to_end(etag)
+        return JSONResponse(body, headers=headers)
+
+    body = await hasilkan()
+    if body.get("degradasi") or "dihasilkan_pada" in body:
+        return JSONResponse(body, headers={"Cache-Control": "no-store"})
+    _cache_etag[etag] = body
+    while len(_cache_etag) > ETAG_CACHE_SIZE:
+        _cache_etag.popitem(last=False)
+    return JSONResponse(body, headers=headers)
+
+async def versi_etag():
+    """
+    Versi data untuk ETag. SEARCH_MODE=indeks memakai indeks in-memory (isinya yang dipakai untuk
+    menyusun respons); mode lain memakai tabel alumni_versi agar tidak perlu memuat seluruh data.
+    None jika tidak ada sumber versi (migrasi 002 belum diterapkan).
+    """
+    if SEARCH_MODE == "indeks":
+        indeks = await indeks_profil.dapatkan()
+        return await asyncio.to_thread(indeks.versi_data)
+    versi = await versi_data.dapatkan()
+    return None if versi is None else str(versi)
+
+@app.get("/rekomendasi")
+async def rekomendasi_get(nama_lengkap: str, request: Request, language: str = "id"):
+    """
+    Varian GET /rekomendasi yang bisa di-cache. ETag diturunkan dari bahasa, mode generasi, nama,
+    dan versi data, sehingga If-None-Match yang cocok dijawab 304 tanpa memanggil Gemini.
+    Hasil prakomputasi diberi ETag dari hash input yang menghasilkannya, sesuai isi yang dikirim.
+    """
+    input = RekomendasiInput(nama_lengkap=nama_lengkap, language=language)
+    # no-cache: cache bersama boleh menyimpan, tetapi wajib revalidasi karena data bisa berubah kapan saja
+    if precompute.PRECOMPUTE_ENABLED:
+        tersimpan = await rekomendasi_tersimpan(nama_lengkap, language)
+        if tersimpan is not None:
+            hash_tersimpan, body = tersimpan
+            headers = {"ETag": buat_etag("rekomendasi", hash_tersimpan), "Cache-Control": "public, no-cache"}
+            if etag_cocok(request.headers.get("if-none-match"), headers["ETag"]):
+                return Response(status_code=304, headers=headers)
+            return JSONResponse(body, headers=headers)
+
+    versi = await versi_etag()
+    if versi is None:
+        return JSONResponse(await rekomendasi(input=input, request=request), headers={"Cache-Control": "no-store"})
+    etag = buat_etag("rekomendasi", GENERATION_MODE, precompute.kunci(nama_lengkap, language), versi)
+    return await respons_dengan_etag(request, etag, "public, no-cache", lambda: rekomendasi(input=input, request=request))
+
+@app.get("/proyek_rekomendasi")
+async def proyek_rekomendasi_get(ide_proyek: str, request: Request, language: str = "id"):
+    """
+    Varian GET /proyek_rekomendasi. ETag diturunkan dari bahasa, mode generasi, ide proyek, dan
+    versi data alumni; hasil boleh disimpan cache bersama selama PROYEK_CACHE_MAX_AGE detik.
+    """
+    input = ProyekInput(ide_proyek=ide_proyek, language=language)
+    versi = await versi_etag()
+    if versi is None:
+        return JSONResponse(await proyek_rekomendasi(input=input, request=request), headers={"Cache-Control": "no-store"})
+    etag = buat_etag("proyek", language, GENERATION_MODE, ide_proyek.strip(), versi)
+    return await respons_dengan_etag(request, etag, f"public, max-age={PROYEK_CACHE_MAX_AGE}",
+                                     lambda: proyek_rekomendasi(input=input, request=request))
+
+# --- ENDPOINT ADMIN UNTUK PROFIL REQUEST ---
+
+@app.get("/admin/profiles")
+def list_profiles(request: Request):
+    if not is_admin(request):
+        raise HTTPException(status_code=403, detail="Akses admin diperlukan.")
+    return {"profiles": daftar_profil()}
+
+@app.get("/admin/profiles/{nama}")
+def download_profile(nama: str, request: Request):
+    if not is_admin(request):
+        raise HTTPException(status_code=403, detail="Akses admin diperlukan.")
+    path = path_profil(nama)
+    if not path:
+        raise HTTPException(status_code=404, detail="Profil tidak ditemukan.")
+    try:
+        with open(path, encoding="utf-8") as f:
+            # Format collapsed-stack: bisa langsung dipakai flamegraph.pl atau diimpor ke speedscope
+            return PlainTextResponse(f.read(), headers={"Content-Disposition": f'attachment; filename="{nama}"'})
+    except FileNotFoundError:
+        # Terhapus oleh pemangkasan profil lama di antara pengecekan dan pembacaan
+        raise HTTPException(status_code=404, detail="Profil tidak ditemukan.")
+
+@app.post("/admin/precompute")
+async def trigger_precompute(request: Request, paksa: bool = False):
+    if not is_admin(request):
+        raise HTTPException(status_code=403, detail="Akses admin diperlukan.")
+    nama = await ambil_semua_nama_alumni()
+    statistik = await precompute.jalankan_batch(nama, regenerasi_rekomendasi, paksa=paksa)
+    if statistik is None:
+        raise HTTPException(status_code=409, detail="Batch prakomputasi sedang berjalan.")
+    return statistik
+
+@app.get("/admin/generasi")
+def statistik_generasi(request: Request):
+    if not is_admin(request):
+        raise HTTPException(status_code=403, detail="Akses admin diperlukan.")
+    return ringkasan_generasi()
+
+@app.post("/admin/impor")
+async def impor_alumni_massal(request: Request, format: str = "jsonl", perbaiki: bool = False):
+    """
+    Impor massal alumni dari body request (CSV atau JSONL). Body ditulis dulu ke file sementara
+    (di memori hingga 8 MB, selebihnya ke disk) agar pemakaian memori tetap terbatas.
+    """
+    if not is_admin(request):
+        raise HTTPException(status_code=403, detail="Akses admin diperlukan.")
+    if format not in ("csv", "jsonl"):
+        raise HTTPException(status_code=400, detail="Format harus csv atau jsonl.")
+
+    with tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024) as tmp:
+        async for chunk in request.stream():
+            tmp.write(chunk)
+        tmp.seek(0)
+        teks = io.TextIOWrapper(tmp, encoding="utf-8", newline="")
+        # Data untuk pembaruan indeks hanya dikumpulkan jika indeks in-memory memang sedang dipakai
+        kumpulkan_indeks = indeks_profil.sudah_dimuat()
+        conn = await db.buka_koneksi()
+        try:
+            statistik, data_indeks = await impor_alumni.impor(conn, teks, format, perbaiki, kumpulkan_indeks)
+        except impor_alumni.ImporGagal as e:
+            raise HTTPException(status_code=422, detail={"pesan": str(e), "errors": e.errors})
+        finally:
+            await db.tutup_koneksi(conn)
+            teks.detach()
+
+    versi_data.lupakan()
+    if data_indeks is not None:
+        # Perbarui indeks in-memory secara inkremental, tanpa memuat ulang seluruh tabel
+        await indeks_profil.terapkan_pembaruan(*data_indeks)
+    return statistik
+
+# Status warm-up untuk GET /ready: nama fase -> durasi (ms)
+_warmup = {"siap": False, "fase": {}}
+
+async def _warmup_db_pool():
+    await db.buat_pool()
+
+async def _warmup_query_panas():
+    # Supabase memakai pgbouncer sehingga prepared statement tidak di-cache (DB_STATEMENT_CACHE_SIZE=0);
+    # menjalankan query sekali tetap membuka sesi backend dan memuat katalog serta buffer tabel.
+    # Jika cache diaktifkan, query dijalankan di setiap koneksi awal pool agar tersimpan sebagai prepared statement.
+    pool = db.pool()
+    jumlah = db.DB_POOL_MIN if db.DB_STATEMENT_CACHE_SIZE > 0 else 1
+    koneksi = [await pool.acquire() for _ in range(max(jumlah, 1))]
+
+    async def _jalankan(conn):
+        await conn.fetchrow(QUERY_ALUMNI_NAMA, "")
+        for sql in QUERY_PELUANG.values():
+            await conn.fetch(sql)
+
+    try:
+        await asyncio.gather(*[_jalankan(conn) for conn in koneksi])
+    finally:
+        for conn in koneksi:
+            await pool.release(conn)
+
+async def _warmup_gemini():
+    # Request metadata model (tanpa generasi) hanya untuk membuka koneksi TLS; status respons diabaikan
+    await _http_client.get(f"{GEMINI_API_BASE}/v1beta/models/gemini-2.0-flash", params={"key": GEMINI_API_KEY}, timeout=10.0)
+
+async def _warmup_indeks():
+    # Pemuatan pertama juga menyiapkan process pool skoring (spawn worker dan snapshot indeks)
+    await indeks_profil.dapatkan()
+
+async def _warmup_pydantic(app: FastAPI):
+    # Membangun skema OpenAPI dan validator model sekali agar tidak dibayar oleh request pertama
+    app.openapi()
+    RekomendasiInput(nama_lengkap="warmup")
+    ProyekInput(ide_proyek="warmup")
+
+async def jalankan_warmup(app: FastAPI):
+    """
+    Menjalankan fase warm-up berurutan dan mencatat durasinya. Fase wajib diulang sampai
+    berhasil; fase opsional yang gagal hanya dicatat sebagai peringatan.
+    """
+    fase = [
+        ("db_pool", _warmup_db_pool, True),
+        ("query_panas", _warmup_query_panas, True),
+        ("gemini_tls", _warmup_gemini, False),
+    ]
+    if SEARCH_MODE == "indeks":
+        fase.append(("indeks_profil", _warmup_indeks, True))
+    fase.append(("pydantic", lambda: _warmup_pydantic(app), True))
+
+    mulai_total = time.perf_counter()
+    for nama, fungsi, wajib in fase:
+        while True:
+            mulai = time.perf_counter()
+            try:
+                await fungsi()
+            except Exception:
+                if not wajib:
+                    logger.warning("Warm-up %s gagal, dilewati", nama, exc_info=True)
+                    break
+                logger.exception("Warm-up %s gagal, dicoba lagi dalam %.0f detik", nama, WARMUP_RETRY_SECONDS)
+                await asyncio.sleep(WARMUP_RETRY_SECONDS)
+                continue
+            _warmup["fase"][nama] = round((time.perf_counter() - mulai) * 1000, 1)
+            logger.info("Warm-up %s selesai dalam %.1f ms", nama, _warmup["fase"][nama])
+            break
+    _warmup["siap"] = True
+    logger.info("Warm-up selesai dalam %.1f ms", (time.perf_counter() - mulai_total) * 1000)
+
+@app.get("/ready")
+def ready():
+    """
+    Readiness probe: 503 sampai warm-up selesai. GET / tetap menjadi liveness probe.
+    """
+    if not _warmup["siap"]:
+        return JSONResponse(status_code=503, content={"status": "warming_up", "fase": _warmup["fase"]})
+    return {"status": "ready", "fase": _warmup["fase"]}
@@ -0,0 +1,66 @@
+"""
+Menjalankan migrasi SQL di sql/migrasi secara berurutan.
+
+  python migrasi.py up              # terapkan semua migrasi yang belum dijalankan
+  python migrasi.py down 001_alumni_search
+  python migrasi.py status
+"""
+import argparse
+import asyncio
+import os
+
+import asyncpg
+from dotenv import load_dotenv
+
+load_dotenv()
+DIREKTORI_MIGRASI = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sql", "migrasi")
+
+
+def daftar_migrasi():
+    return sorted(f[:-4] for f in os.listdir(DIREKTORI_MIGRASI) if f.endswith(".sql") and not f.endswith(".down.sql"))
+
+
+async def _sudah_diterapkan(conn):
+    await conn.execute("CREATE TABLE IF NOT EXISTS schema_migrasi (nama TEXT PRIMARY KEY, diterapkan TIMESTAMPTZ NOT NULL DEFAULT now())")
+    return {r["nama"] for r in await conn.fetch("SELECT nama FROM schema_migrasi")}
+
+
+async def main(args):
+    conn = await asyncpg.connect(args.dsn, statement_cache_size=0)
+    try:
+        sudah = await _sudah_diterapkan(conn)
+        if args.perintah == "status":
+            for nama in daftar_migrasi():
+                print(f"{'[x]' if nama in sudah else '[ ]'} {nama}")
+        elif args.perintah == "up":
+            for nama in daftar_migrasi():
+                if nama in sudah:
+                    continue
+                with open(os.path.join(DIREKTORI_MIGRASI, nama + ".sql"), encoding="utf-8") as f:
+                    sql = f.read()
+                async with conn.transaction():
+                    await conn.execute(sql)
+                    await conn.execute("INSERT INTO schema_migrasi (nama) VALUES ($1)", nama)
+                print(f"Diterapkan: {nama}")
+        elif args.perintah == "down":
+            if args.nama not in sudah:
+                raise SystemExit(f"Migrasi {args.nama} belum diterapkan.")
+            with open(os.path.join(DIREKTORI_MIGRASI, args.nama + ".down.sql"), encoding="utf-8") as f:
+                sql = f.read()
+            async with conn.transaction():
+                await conn.execute(sql)
+                await conn.execute("DELETE FROM schema_migrasi WHERE nama = $1", args.nama)
+            print(f"Dibatalkan: {args.nama}")
+    finally:
+        await conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migrasi skema Alumni AI")
+    parser.add_argument("--dsn", default=os.getenv("SUPABASE_DB_URL"))
+    sub = parser.add_subparsers(dest="perintah", required=True)
+    sub.add_parser("up")
+    sub.add_parser("status")
+    p_down = sub.add_parser("down")
+    p_down.add_argument("nama")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,263 @@
+"""
+Prakomputasi rekomendasi alumni dan penyajian stale-while-revalidate.
+
+Hasil disimpan di SQLite lokal bersama hash dari prompt yang menghasilkannya. Prompt sudah
+memuat profil alumni, peluang, dan daftar kolaborator, sehingga hash berubah jika salah satu
+data tersebut berubah.
+"""
+import asyncio
+import datetime
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from dotenv import load_dotenv
+
+load_dotenv()
+PRECOMPUTE_ENABLED = os.getenv("PRECOMPUTE_ENABLED", "0") in ("1", "true")
+PRECOMPUTE_DB = os.getenv("PRECOMPUTE_DB", "precompute.sqlite3")
+# Jam lokal (0-23) saat batch prakomputasi dijalankan, bisa lebih dari satu: "2,14"
+PRECOMPUTE_JAM = [int(j) for j in os.getenv("PRECOMPUTE_JAM", "2").split(",") if j.strip()]
+# Jumlah alumni yang diproses bersamaan saat batch (membatasi beban DB dan Gemini)
+PRECOMPUTE_CONCURRENCY = int(os.getenv("PRECOMPUTE_CONCURRENCY", "3"))
+# "all" = regenerasi semua alumni, "changed" = hanya yang hash input-nya berubah
+PRECOMPUTE_MODE = os.getenv("PRECOMPUTE_MODE", "changed")
+PRECOMPUTE_LANGUAGES = [b.strip() for b in os.getenv("PRECOMPUTE_LANGUAGES", "id").split(",") if b.strip()]
+# Hasil yang terakhir diperiksa lebih lama dari ini akan direvalidasi di background saat disajikan
+PRECOMPUTE_REVALIDATE_SECONDS = float(os.getenv("PRECOMPUTE_REVALIDATE_SECONDS", "300"))
+# Lama lease batch: setiap worker uvicorn punya scheduler sendiri, hanya pemegang lease yang
+# menjalankan batch. Lease kedaluwarsa sendiri jika prosesnya mati di tengah batch.
+PRECOMPUTE_LEASE_SECONDS = float(os.getenv("PRECOMPUTE_LEASE_SECONDS", "21600"))
+
+logger = logging.getLogger("alumni_ai.precompute")
+
+# Kunci yang sedang direvalidasi, agar satu alumni tidak diregenerasi beberapa kali bersamaan
+_sedang_revalidasi = set()
+_tugas_background = set()
+# Identitas proses ini sebagai pemegang lease
+_pemilik_lease = f"{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+_skema_siap = False
+_skema_lock = threading.Lock()
+
+
+def _koneksi():
+    # Dipanggil di thread (asyncio.to_thread); skema cukup dibuat sekali per proses
+    global _skema_siap
+    conn = sqlite3.connect(PRECOMPUTE_DB)
+    conn.row_factory = sqlite3.Row
+    if not _skema_siap:
+        with _skema_lock:
+            if not _skema_siap:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS hasil_rekomendasi (
+                        kunci TEXT PRIMARY KEY,
+                        hash_input TEXT NOT NULL,
+                        hasil TEXT NOT NULL,
+                        dibuat REAL NOT NULL,
+                        diperiksa REAL NOT NULL
+                    )
+                """)
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS lease_batch (
+                        nama TEXT PRIMARY KEY,
+                        pemilik TEXT NOT NULL,
+                        berakhir REAL NOT NULL
+                    )
+                """)
+                _skema_siap = True
+    return conn
+
+
+def kunci(nama_lengkap: str, language: str) -> str:
+    # Normalisasi sama seperti query LOWER(TRIM(nama_lengkap)) di ambil_profil_alumni
+    return f"{language.lower()}:{nama_lengkap.strip().lower()}"
+
+
+def hash_input(prompt: str, mode: str = "") -> str:
+    # Mode generasi ikut di-hash agar hasil dari mode lain tidak disajikan sebagai hasil segar
+    return hashlib.sha256(f"{mode}\0{prompt}".encode("utf-8")).hexdigest()
+
+
+def _ambil(k: str):
+    conn = _koneksi()
+    try:
+        row = conn.execute("SELECT * FROM hasil_rekomendasi WHERE kunci = ?", (k,)).fetchone()
+        return dict(row) if row else None
+    finally:
+        conn.close()
+
+
+def _simpan(k: str, h: str, hasil: str):
+    sekarang = time.time()
+    conn = _koneksi()
+    try:
+        with conn:
+            conn.execute("""
+                INSERT INTO hasil_rekomendasi (kunci, hash_input, hasil, dibuat, diperiksa) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(kunci) DO UPDATE SET hash_input = excluded.hash_input, hasil = excluded.hasil,
+                    dibuat = excluded.dibuat, diperiksa = excluded.diperiksa
+            """, (k, h, hasil, sekarang, sekarang))
+    finally:
+        conn.close()
+    return {"kunci": k, "hash_input": h, "hasil": hasil, "dibuat": sekarang, "diperiksa": sekarang}
+
+
+def _tandai_diperiksa(k: str):
+    conn = _koneksi()
+    try:
+        with conn:
+            conn.execute("UPDATE hasil_rekomendasi SET diperiksa = ? WHERE kunci = ?", (time.time(), k))
+    finally:
+        conn.close()
+
+
+def _hapus(k: str):
+    conn = _koneksi()
+    try:
+        with conn:
+            conn.execute("DELETE FROM hasil_rekomendasi WHERE kunci = ?", (k,))
+    finally:
+        conn.close()
+
+
+def _ambil_lease(nama: str, pemilik: str, durasi: float) -> bool:
+    # Upsert hanya menimpa lease yang sudah kedaluwarsa; sqlite menyerialkan penulisan antar proses
+    sekarang = time.time()
+    conn = _koneksi()
+    try:
+        with conn:
+            conn.execute("DELETE FROM lease_batch WHERE berakhir < ?", (sekarang,))
+            conn.execute("""
+                INSERT INTO lease_batch (nama, pemilik, berakhir) VALUES (?, ?, ?)
+                ON CONFLICT(nama) DO UPDATE SET pemilik = excluded.pemilik, berakhir = excluded.berakhir
+                WHERE lease_batch.berakhir < ?
+            """, (nama, pemilik, sekarang + durasi, sekarang))
+        row = conn.execute("SELECT pemilik FROM lease_batch WHERE nama = ?", (nama,)).fetchone()
+        return row is not None and row["pemilik"] == pemilik
+    finally:
+        conn.close()
+
+
+def _lepas_lease(nama: str, pemilik: str):
+    conn = _koneksi()
+    try:
+        with conn:
+            conn.execute("DELETE FROM lease_batch WHERE nama = ? AND pemilik = ?", (nama, pemilik))
+    finally:
+        conn.close()
+
+
+# sqlite3 bersifat blocking (disk I/O, lock file); jalankan di thread agar event loop tidak tertahan
+async def ambil(k: str):
+    return await asyncio.to_thread(_ambil, k)
+
+
+async def simpan(k: str, h: str, hasil: str):
+    return await asyncio.to_thread(_simpan, k, h, hasil)
+
+
+async def tandai_diperiksa(k: str):
+    await asyncio.to_thread(_tandai_diperiksa, k)
+
+
+async def hapus(k: str):
+    """Menghapus hasil tersimpan, misalnya karena alumninya sudah tidak ada."""
+    await asyncio.to_thread(_hapus, k)
+
+
+def revalidasi_jika_perlu(k: str, entry: dict, regenerasi):
+    """
+    Menjadwalkan regenerasi di background jika entry sudah lama tidak diperiksa.
+    `regenerasi` adalah fungsi tanpa argumen yang mengembalikan coroutine.
+    """
+    if time.time() - entry["diperiksa"] < PRECOMPUTE_REVALIDATE_SECONDS or k in _sedang_revalidasi:
+        return False
+
+    async def _jalankan():
+        _sedang_revalidasi.add(k)
+        try:
+            await regenerasi()
+        except Exception:
+            logger.exception("Revalidasi gagal untuk %s", k)
+        finally:
+            _sedang_revalidasi.discard(k)
+
+    tugas = asyncio.create_task(_jalankan())
+    # Simpan referensi agar task tidak di-garbage-collect sebelum selesai
+    _tugas_background.add(tugas)
+    tugas.add_done_callback(_tugas_background.discard)
+    return True
+
+
+async def jalankan_batch(daftar_nama, regenerasi, paksa: bool):
+    """
+    Meregenerasi rekomendasi untuk semua nama dan bahasa dengan concurrency terbatas.
+    `regenerasi(nama, language, paksa)` mengembalikan True jika Gemini benar-benar dipanggil.
+
+    Batch hanya berjalan jika lease lintas proses berhasil diambil, sehingga concurrency tetap
+    PRECOMPUTE_CONCURRENCY berapa pun jumlah worker. Mengembalikan None jika batch sedang
+    dijalankan proses lain.
+    """
+    if not await asyncio.to_thread(_ambil_lease, "batch", _pemilik_lease, PRECOMPUTE_LEASE_SECONDS):
+        logger.info("Batch prakomputasi sedang dijalankan proses lain, dilewati")
+        return None
+    try:
+        return await _jalankan_batch(daftar_nama, regenerasi, paksa)
+    finally:
+        await asyncio.to_thread(_lepas_lease, "batch", _pemilik_lease)
+
+
+async def _jalankan_batch(daftar_nama, regenerasi, paksa: bool):
+    semaphore = asyncio.Semaphore(PRECOMPUTE_CONCURRENCY)
+    statistik = {"diproses": 0, "diregenerasi": 0, "gagal": 0}
+
+    async def _satu(nama, language):
+        async with semaphore:
+            try:
+                if await regenerasi(nama, language, paksa):
+                    statistik["diregenerasi"] += 1
+            except Exception:
+                statistik["gagal"] += 1
+                logger.exception("Prakomputasi gagal untuk %s (%s)", nama, language)
+            statistik["diproses"] += 1
+
+    mulai = time.perf_counter()
+    await asyncio.gather(*[_satu(nama, language) for nama in daftar_nama for language in PRECOMPUTE_LANGUAGES])
+    logger.info("Batch prakomputasi selesai dalam %.1fs: %s", time.perf_counter() - mulai, statistik)
+    return statistik
+
+
+def _detik_sampai_jadwal_berikutnya(sekarang: datetime.datetime) -> float:
+    kandidat = []
+    for jam in PRECOMPUTE_JAM:
+        waktu = sekarang.replace(hour=jam, minute=0, second=0, microsecond=0)
+        if waktu <= sekarang:
+            waktu += datetime.timedelta(days=1)
+        kandidat.append(waktu)
+    return (min(kandidat) - sekarang).total_seconds()
+
+
+async def jalankan_scheduler(ambil_daftar_nama, regenerasi):
+    """
+    Loop background: tidur sampai jam off-peak berikutnya, lalu jalankan batch prakomputasi.
+    Setiap worker menjalankan loop ini; lease per jadwal (tidak dilepas sampai kedaluwarsa)
+    memastikan tiap jadwal hanya dijalankan satu proses walaupun worker lain bangun terlambat.
+    """
+    while True:
+        tunggu = _detik_sampai_jadwal_berikutnya(datetime.datetime.now())
+        jadwal = (datetime.datetime.now() + datetime.timedelta(seconds=tunggu)).strftime("%Y-%m-%dT%H")
+        logger.info("Batch prakomputasi berikutnya dalam %.0f detik", tunggu)
+        await asyncio.sleep(tunggu)
+        try:
+            if not await asyncio.to_thread(_ambil_lease, f"jadwal:{jadwal}", _pemilik_lease, PRECOMPUTE_LEASE_SECONDS):
+                logger.info("Batch prakomputasi jadwal %s sudah diambil proses lain", jadwal)
+                continue
+            daftar_nama = await ambil_daftar_nama()
+            await jalankan_batch(daftar_nama, regenerasi, paksa=PRECOMPUTE_MODE == "all")
+        except Exception:
+            logger.exception("Batch prakomputasi gagal")
@@ -0,0 +1,163 @@
+"""
+Profiling on-demand per request dengan output collapsed-stack (siap untuk flamegraph.pl / speedscope).
+
+Profil diaktifkan jika request membawa header X-Admin-Token yang valid dan header
+X-Profile: 1 (atau query ?profile=1), atau secara acak sesuai PROFILE_SAMPLE_RATE.
+"""
+import asyncio
+import functools
+import logging
+import os
+import random
+import secrets
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from dotenv import load_dotenv
+
+load_dotenv()
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+# Fraksi request biasa yang diprofil otomatis (0 = hanya jika diminta admin)
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+# Interval sampling stack dalam milidetik
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+# Jumlah file profil terbaru yang disimpan, sisanya dihapus
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "50"))
+
+logger = logging.getLogger("alumni_ai.profiling")
+
+
+def is_admin(request) -> bool:
+    """
+    Mengecek header X-Admin-Token terhadap ADMIN_TOKEN. Jika ADMIN_TOKEN kosong, fitur admin nonaktif.
+    """
+    token = request.headers.get("x-admin-token", "")
+    return bool(ADMIN_TOKEN) and secrets.compare_digest(token, ADMIN_TOKEN)
+
+
+def harus_diprofil(request) -> bool:
+    diminta = request.headers.get("x-profile", "") in ("1", "true") or request.query_params.get("profile") in ("1", "true")
+    if diminta and is_admin(request):
+        return True
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+
+def _label_frame(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name}@{os.path.basename(code.co_filename)}:{code.co_firstlineno}"
+
+
+class ProfilerSampling:
+    """
+    Sampler stack berbasis thread. Hanya sampel yang memuat frame root (coroutine request ini)
+    yang dihitung, sehingga pekerjaan request lain di event loop yang sama tidak ikut tercatat.
+    """
+
+    def __init__(self, frame_root, interval_ms: float = PROFILE_INTERVAL_MS):
+        self.frame_root = frame_root
+        self.interval = interval_ms / 1000.0
+        self.thread_target = threading.get_ident()
+        self.stacks = Counter()
+        self.jumlah_sampel = 0
+        self._berhenti = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="profiler-sampling", daemon=True)
+
+    def mulai(self):
+        self.waktu_mulai = time.perf_counter()
+        self._thread.start()
+
+    def berhenti(self):
+        self._berhenti.set()
+        self._thread.join()
+        self.durasi = time.perf_counter() - self.waktu_mulai
+
+    def _loop(self):
+        while not self._berhenti.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_target)
+            self.jumlah_sampel += 1
+            stack = []
+            while frame is not None:
+                stack.append(_label_frame(frame))
+                if frame is self.frame_root:
+                    break
+                frame = frame.f_back
+            else:
+                # Frame root tidak ada di stack: request sedang menunggu I/O atau event loop menjalankan task lain
+                continue
+            self.stacks[";".join(reversed(stack))] += 1
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {jumlah}\n" for stack, jumlah in self.stacks.most_common())
+
+
+def _simpan_profil(nama_endpoint: str, profiler: ProfilerSampling) -> str:
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    nama_file = f"{time.strftime('%Y%m%d-%H%M%S')}_{nama_endpoint}_{uuid.uuid4().hex[:8]}.folded"
+    with open(os.path.join(PROFILE_DIR, nama_file), "w", encoding="utf-8") as f:
+        f.write(profiler.collapsed())
+
+    # Buang profil lama agar direktori tidak tumbuh tanpa batas
+    semua = sorted(daftar_profil(), key=lambda p: p["waktu"], reverse=True)
+    for lama in semua[PROFILE_MAX_FILES:]:
+        try:
+            os.remove(os.path.join(PROFILE_DIR, lama["nama"]))
+        except FileNotFoundError:
+            pass # Sudah dihapus request lain yang selesai bersamaan
+    return nama_file
+
+
+def daftar_profil():
+    """
+    Daftar file profil yang tersimpan beserta ukuran dan waktu pembuatannya.
+    """
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    hasil = []
+    for nama in os.listdir(PROFILE_DIR):
+        if not nama.endswith(".folded"):
+            continue
+        try:
+            st = os.stat(os.path.join(PROFILE_DIR, nama))
+        except FileNotFoundError:
+            continue # Dihapus oleh pemangkasan di request lain setelah listdir
+        hasil.append({"nama": nama, "ukuran": st.st_size, "waktu": st.st_mtime})
+    return sorted(hasil, key=lambda p: p["waktu"], reverse=True)
+
+
+def path_profil(nama: str):
+    """
+    Path absolut file profil, atau None jika nama tidak valid / file tidak ada.
+    """
+    if os.path.basename(nama) != nama or not nama.endswith(".folded"):
+        return None
+    path = os.path.join(PROFILE_DIR, nama)
+    return path if os.path.isfile(path) else None
+
+
+def diprofil(nama_endpoint: str):
+    """
+    Dekorator endpoint FastAPI. Endpoint harus menerima parameter `request: Request`.
+    """
+    def dekorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            request = kwargs.get("request")
+            if request is None or not harus_diprofil(request):
+                return await fn(*args, **kwargs)
+
+            profiler = ProfilerSampling(sys._getframe())
+            profiler.mulai()
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                # Profiling tidak boleh mengubah respons: kegagalan menyimpan hanya dicatat
+                try:
+                    profiler.berhenti()
+                    await asyncio.to_thread(_simpan_profil, nama_endpoint, profiler)
+                except Exception:
+                    logger.exception("Gagal menyimpan profil %s", nama_endpoint)
+        return wrapper
+    return dekorator
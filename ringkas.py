@@ -0,0 +1,309 @@
+"""
+Mode generasi ringkas (GENERATION_MODE=ringkas).
+
+Gemini hanya diminta JSON kecil sesuai responseSchema: id alumni, peran, justifikasi singkat,
+referensi peluang, dan judul proyek. Teks akhir (Indonesia/Inggris) disusun di server dari data
+profil yang sudah ada, sehingga token output tidak dipakai untuk mengulang nama, aktivitas,
+dan keahlian alumni.
+"""
+import json
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+# Jumlah percobaan ulang jika JSON dari Gemini rusak atau tidak sesuai skema
+RINGKAS_RETRIES = int(os.getenv("RINGKAS_RETRIES", "1"))
+RINGKAS_MAX_TOKENS_REKOMENDASI = int(os.getenv("RINGKAS_MAX_TOKENS_REKOMENDASI", "900"))
+RINGKAS_MAX_TOKENS_PROYEK = int(os.getenv("RINGKAS_MAX_TOKENS_PROYEK", "700"))
+# Batas ref per jenis peluang yang ditawarkan ke Gemini; enum yang terlalu besar ditolak API (HTTP 400)
+RINGKAS_MAKS_REF_PER_JENIS = int(os.getenv("RINGKAS_MAKS_REF_PER_JENIS", "15"))
+
+
+class OutputTidakValid(ValueError):
+    pass
+
+
+# --- Skema (subset OpenAPI yang dipakai responseSchema Gemini) ---
+
+def _string(enum=None):
+    if enum:
+        # id dan referensi dibatasi dengan enum agar Gemini tidak bisa mengarang nilai lain
+        return {"type": "STRING", "format": "enum", "enum": list(enum)}
+    return {"type": "STRING"}
+
+
+def _array(items, min_items=None, max_items=None):
+    skema = {"type": "ARRAY", "items": items}
+    if min_items is not None:
+        skema["minItems"] = min_items
+    if max_items is not None:
+        skema["maxItems"] = max_items
+    return skema
+
+
+def _objek(properti, wajib):
+    return {"type": "OBJECT", "properties": properti, "required": wajib}
+
+
+def ref_peluang(data):
+    """
+    Daftar (ref, jenis, baris) untuk peluang di data, urut seperti di prompt, paling banyak
+    RINGKAS_MAKS_REF_PER_JENIS per jenis.
+    """
+    refs = []
+    for prefiks, kunci in (("B", "peluang_bisnis"), ("P", "peluang_pekerja"), ("R", "peluang_irt")):
+        for i, row in enumerate(data[kunci][:RINGKAS_MAKS_REF_PER_JENIS], start=1):
+            refs.append((f"{prefiks}{i}", prefiks, row))
+    return refs
+
+
+def skema_rekomendasi(data):
+    id_kolaborator = [str(a["id"]) for a in data["top_alumni_kolaborasi"]]
+    refs = [ref for ref, _, _ in ref_peluang(data)]
+    properti, wajib = {}, []
+    if id_kolaborator:
+        properti["kolaborator"] = _array(_objek({"id": _string(id_kolaborator), "peran": _string(), "alasan": _string()},
+                                                ["id", "peran", "alasan"]), max_items=len(id_kolaborator))
+        wajib.append("kolaborator")
+    if refs:
+        properti_peluang = {"ref": _string(refs), "alasan": _string()}
+        if id_kolaborator:
+            properti_peluang["kolaborator"] = _array(_string(id_kolaborator))
+        properti["peluang"] = _array(_objek(properti_peluang, ["ref", "alasan"]))
+        wajib.append("peluang")
+    # Jumlah item mengikuti instruksi di prompt (saran 3-5, minimal 5 judul proyek)
+    properti["saran"] = _array(_string(), min_items=3, max_items=5)
+    properti_proyek = {"judul": _string()}
+    if id_kolaborator:
+        properti_proyek["alumni"] = _array(_string(id_kolaborator))
+    properti["proyek"] = _array(_objek(properti_proyek, ["judul"]), min_items=5, max_items=8)
+    return _objek(properti, wajib + ["saran", "proyek"])
+
+
+def skema_proyek(recommended_alumni):
+    id_alumni = [str(a["id"]) for a in recommended_alumni]
+    properti = {"judul": _string(), "gambaran": _string(), "kebutuhan": _array(_string(), min_items=3, max_items=5)}
+    wajib = ["judul", "gambaran", "kebutuhan"]
+    if id_alumni:
+        properti["alumni"] = _array(_objek({"id": _string(id_alumni), "peran": _string(), "alasan": _string()},
+                                           ["id", "peran", "alasan"]), max_items=10)
+        wajib.append("alumni")
+    return _objek(properti, wajib)
+
+
+# --- Prompt ---
+
+def _en(language):
+    return language.lower() == "en"
+
+
+def prompt_rekomendasi(konteks, data, language):
+    """
+    Konteks sama dengan mode bebas (bagian_prompt), ditambah daftar id/ref dan instruksi JSON.
+    """
+    kolaborator = "; ".join(f"[{a['id']}] {a['nama_alumni_kolaborasi']}" for a in data["top_alumni_kolaborasi"]) or "-"
+    peluang = "; ".join(f"[{ref}] {_judul_peluang(jenis, row, language)}" for ref, jenis, row in ref_peluang(data)) or "-"
+    panggilan = data["nama_panggilan"]
+    if _en(language):
+        return konteks + (
+            f"References for the JSON answer:\nCollaborators (id): {kolaborator}\nOpportunities (ref): {peluang}\n\n"
+            f"Answer ONLY with JSON matching the schema. Do not repeat profile data; names and details are added by the system.\n"
+            f"- kolaborator: the most relevant alumni from the list above for {panggilan}, with a role and a short reason (max 20 words).\n"
+            f"- peluang: opportunities matching {panggilan}'s skills, a short reason (max 25 words), and the ids of collaborators who could join.\n"
+            f"- saran: 3-5 practical career or collaboration recommendations, one sentence each.\n"
+            f"- proyek: at least 5 concrete, realistic collaboration project titles with the ids of the alumni involved.\n"
+            f"Write all text in English."
+        )
+    return konteks + (
+        f"Referensi untuk jawaban JSON:\nKolaborator (id): {kolaborator}\nPeluang (ref): {peluang}\n\n"
+        f"Jawab HANYA dengan JSON sesuai skema. Jangan mengulang data profil; nama dan detail ditambahkan oleh sistem.\n"
+        f"- kolaborator: alumni dari daftar di atas yang paling relevan untuk {panggilan}, dengan peran dan alasan singkat (maks. 20 kata).\n"
+        f"- peluang: peluang yang cocok dengan keahlian {panggilan}, alasan singkat (maks. 25 kata), dan id kolaborator yang bisa terlibat.\n"
+        f"- saran: 3-5 rekomendasi karir atau kolaborasi yang nyata, masing-masing satu kalimat.\n"
+        f"- proyek: minimal 5 judul proyek kolaborasi yang konkret dan realistis beserta id alumni yang terlibat.\n"
+        f"Tulis semua teks dalam bahasa Indonesia."
+    )
+
+
+def prompt_proyek(konteks, recommended_alumni, language):
+    daftar = "; ".join(f"[{a['id']}] {a['nama_lengkap']}" for a in recommended_alumni) or "-"
+    if _en(language):
+        return konteks + (
+            f"Alumni (id): {daftar}\n\n"
+            f"Answer ONLY with JSON matching the schema. Do not repeat alumni names, activities, or skills; they are added by the system.\n"
+            f"- judul: a short project title.\n"
+            f"- gambaran: a brief overview of the project and its needs (max 40 words).\n"
+            f"- kebutuhan: 3-5 talent needs, a few words each.\n"
+            f"- alumni: up to 10 of the most suitable alumni above, each with a specific role and a short justification (max 20 words).\n"
+            f"Write all text in English."
+        )
+    return konteks + (
+        f"Alumni (id): {daftar}\n\n"
+        f"Jawab HANYA dengan JSON sesuai skema. Jangan mengulang nama, aktivitas, atau keahlian alumni; data itu ditambahkan oleh sistem.\n"
+        f"- judul: judul proyek yang singkat.\n"
+        f"- gambaran: deskripsi ringkas proyek dan kebutuhannya (maks. 40 kata).\n"
+        f"- kebutuhan: 3-5 kebutuhan talenta, beberapa kata saja.\n"
+        f"- alumni: hingga 10 alumni di atas yang paling cocok, masing-masing dengan peran spesifik dan justifikasi singkat (maks. 20 kata).\n"
+        f"Tulis semua teks dalam bahasa Indonesia."
+    )
+
+
+# --- Validasi ---
+
+def validasi(nilai, skema, jalur="jawaban"):
+    """
+    Memeriksa nilai terhadap skema yang sama dengan yang dikirim ke Gemini.
+    Melempar OutputTidakValid pada ketidaksesuaian pertama.
+    """
+    tipe = skema["type"]
+    if tipe == "OBJECT":
+        if not isinstance(nilai, dict):
+            raise OutputTidakValid(f"{jalur} harus objek")
+        for k in skema.get("required", []):
+            if k not in nilai:
+                raise OutputTidakValid(f"{jalur}.{k} wajib ada")
+        for k, sub in skema["properties"].items():
+            if k in nilai:
+                validasi(nilai[k], sub, f"{jalur}.{k}")
+    elif tipe == "ARRAY":
+        if not isinstance(nilai, list):
+            raise OutputTidakValid(f"{jalur} harus array")
+        if len(nilai) < skema.get("minItems", 0):
+            raise OutputTidakValid(f"{jalur} minimal {skema['minItems']} item")
+        if "maxItems" in skema and len(nilai) > skema["maxItems"]:
+            raise OutputTidakValid(f"{jalur} maksimal {skema['maxItems']} item")
+        for i, item in enumerate(nilai):
+            validasi(item, skema["items"], f"{jalur}[{i}]")
+    elif tipe == "STRING":
+        if not isinstance(nilai, str) or not nilai.strip():
+            raise OutputTidakValid(f"{jalur} harus teks tidak kosong")
+        if "enum" in skema and nilai not in skema["enum"]:
+            raise OutputTidakValid(f"{jalur} bernilai {nilai!r} di luar daftar")
+
+
+def parse(teks: str, skema):
+    try:
+        jawaban = json.loads(teks)
+    except json.JSONDecodeError as e:
+        raise OutputTidakValid(f"JSON rusak: {e}")
+    validasi(jawaban, skema)
+    return jawaban
+
+
+# --- Render teks akhir ---
+
+def _unik(items, kunci):
+    terlihat = set()
+    for item in items:
+        if item[kunci] not in terlihat:
+            terlihat.add(item[kunci])
+            yield item
+
+
+def _judul_peluang(jenis, row, language):
+    if jenis == "B":
+        return (f"Business '{row.get('nama_usaha') or 'Unknown'}'" if _en(language)
+                else f"Bisnis '{row.get('nama_usaha') or 'Tidak Diketahui'}'")
+    if jenis == "P":
+        return (f"Worker alumni skilled in {row.get('skill') or '-'}" if _en(language)
+                else f"Alumni pekerja dengan keahlian {row.get('skill') or '-'}")
+    return (f"Homemaker alumni interested in {row.get('bidang_minat') or '-'}" if _en(language)
+            else f"Alumni IRT dengan minat {row.get('bidang_minat') or '-'}")
+
+
+def _kebutuhan_peluang(jenis, row, language):
+    if jenis == "B":
+        label = (("support", "dukungan"), ("collaboration", "kolaborasi"), ("human resources", "butuh_sdm")) if _en(language) \
+            else (("dukungan", "dukungan"), ("kolaborasi", "kolaborasi"), ("butuh SDM", "butuh_sdm"))
+    elif jenis == "P":
+        label = (("needs", "dukungan"),) if _en(language) else (("membutuhkan", "dukungan"),)
+    else:
+        label = (("focus", "spesifik_bidang"),) if _en(language) else (("fokus", "spesifik_bidang"),)
+    return "; ".join(f"{nama}: {row[k]}" for nama, k in label if row.get(k))
+
+
+def render_rekomendasi(data, jawaban, language):
+    en = _en(language)
+    panggilan = data["nama_panggilan"]
+    kolaborator = {str(a["id"]): a for a in data["top_alumni_kolaborasi"]}
+    peluang = {ref: (jenis, row) for ref, jenis, row in ref_peluang(data)}
+    baris = []
+
+    # 1. Ringkasan profil, sepenuhnya dari data DB
+    bekerja = "bekerja" in data["aktivitas"].lower()
+    baris.append(f"**1. {'Profile Summary' if en else 'Ringkasan Profil'} {panggilan}**")
+    baris.append(f"{panggilan} ({data['nama']}) — {'Current activity' if en else 'Aktivitas saat ini'}: {data['aktivitas']}. "
+                 f"{'Skills' if en else 'Keahlian'}: {data['skills'] or '-'}.")
+    for k, v in (data["detail"] or {}).items():
+        # Sama seperti bagian_prompt: skill sudah terwakili oleh keahlian, dukungan pekerja ditampilkan terpisah
+        if v and k != "skill" and not (k == "dukungan" and bekerja):
+            baris.append(f"- {k.replace('_', ' ').capitalize()}: {v}")
+    if bekerja and data["detail"] and data["detail"].get("dukungan"):
+        baris.append(f"- {'Support needed' if en else 'Dukungan yang dibutuhkan'}: {data['detail']['dukungan']}")
+
+    # 2. Analisis peluang dan kolaborator
+    baris.append("")
+    baris.append(f"**2. {'Collaboration Opportunities' if en else 'Peluang Kolaborasi'}**")
+    daftar_peluang = list(_unik(jawaban.get("peluang", []), "ref"))
+    if not daftar_peluang:
+        baris.append(f"No opportunities from other alumni currently match {panggilan}'s skills." if en
+                     else f"Belum ada peluang dari alumni lain yang cocok dengan keahlian {panggilan}.")
+    for p in daftar_peluang:
+        jenis, row = peluang[p["ref"]]
+        kebutuhan = _kebutuhan_peluang(jenis, row, language)
+        baris.append(f"- **{_judul_peluang(jenis, row, language)}**{f' ({kebutuhan})' if kebutuhan else ''}: {p['alasan'].strip()}")
+        terlibat = [kolaborator[i]["nama_alumni_kolaborasi"] for i in dict.fromkeys(p.get("kolaborator", []))]
+        if terlibat:
+            baris.append(f"  {'Alumni who could be involved' if en else 'Alumni yang bisa terlibat'}: {', '.join(terlibat)}")
+    daftar_kolaborator = list(_unik(jawaban.get("kolaborator", []), "id"))
+    if daftar_kolaborator:
+        baris.append("")
+        baris.append(f"**{'Most suitable alumni for collaboration' if en else 'Alumni yang paling cocok untuk kolaborasi'}**")
+        for k in daftar_kolaborator:
+            a = kolaborator[k["id"]]
+            baris.append(f"- **{a['nama_alumni_kolaborasi']}** ({a['aktivitas'].capitalize()}; "
+                         f"{'skills' if en else 'keahlian'}: {a['relevance_skills'] or '-'}) — {k['peran'].strip()}: {k['alasan'].strip()}")
+
+    # 3. Saran
+    baris.append("")
+    baris.append(f"**3. {'Recommendations' if en else 'Rekomendasi'}**")
+    baris.extend(f"- {s.strip()}" for s in jawaban["saran"])
+
+    # 4. Judul proyek
+    baris.append("")
+    baris.append(f"**4. {'Collaboration Project Ideas' if en else 'Ide Proyek Kolaborasi'}**")
+    for i, p in enumerate(jawaban["proyek"], start=1):
+        nama = [panggilan] + [kolaborator[a]["nama_alumni_kolaborasi"] for a in dict.fromkeys(p.get("alumni", []))]
+        baris.append(f"{i}. **{p['judul'].strip()}** ({'with' if en else 'bersama'} {', '.join(nama)})")
+    return "\n".join(baris)
+
+
+def render_proyek(ide_proyek, recommended_alumni, jawaban, language):
+    en = _en(language)
+    alumni = {str(a["id"]): a for a in recommended_alumni}
+    baris = [
+        f"**1. {'Project Overview' if en else 'Gambaran Proyek'}: {jawaban['judul'].strip()}**",
+        f"{'Project idea' if en else 'Ide proyek'}: {ide_proyek}",
+        jawaban["gambaran"].strip(),
+        "",
+        f"**2. {'Talent Needs' if en else 'Kebutuhan Talenta'}**",
+    ]
+    baris.extend(f"- {k.strip()}" for k in jawaban["kebutuhan"])
+    baris.append("")
+    baris.append(f"**3. {'Recommended Alumni' if en else 'Rekomendasi Alumni'}**")
+    daftar = list(_unik(jawaban.get("alumni", []), "id"))
+    if not daftar:
+        baris.append("No relevant alumni found in the database for this project." if en
+                     else "Tidak ada alumni yang relevan ditemukan di database untuk proyek ini.")
+    for r in daftar:
+        a = alumni[r["id"]]
+        baris.append(f"- **{a['nama_lengkap']}** — {r['peran'].strip()}")
+        baris.append(f"  {'Activity' if en else 'Aktivitas'}: {a['aktivitas'].capitalize()}; "
+                     f"{'Skills' if en else 'Keahlian'}: {a['skills_gabungan'] or '-'}")
+        baris.append(f"  {'Justification' if en else 'Justifikasi'}: {r['alasan'].strip()}")
+    baris.append("")
+    baris.append(f"**4. {'Closing' if en else 'Penutup'}**")
+    baris.append("This list is a starting point for forming the team; please contact the alumni to confirm their availability and interest."
+                 if en else
+                 "Daftar ini dapat menjadi titik awal pembentukan tim; silakan hubungi alumni terkait untuk memastikan ketersediaan dan minat mereka.")
+    return "\n".join(baris)
@@ -0,0 +1,303 @@
+"""
+Skoring kandidat alumni dan pencocokan peluang (`cocok`) di luar event loop.
+
+Fungsi murni di modul ini dipakai baik secara inline maupun di worker ProcessPoolExecutor.
+Worker menerima snapshot indeks profil sekali saat dibuat (initializer), sehingga tiap
+tugas hanya mengirim kata kunci dan rentang chunk, bukan seluruh data profil. Pembaruan kecil
+dari impor dikirim sebagai patch berversi yang diterapkan worker sendiri, tanpa spawn ulang.
+"""
+import asyncio
+import heapq
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dotenv import load_dotenv
+
+load_dotenv()
+# 0 = tanpa process pool, semua skoring dijalankan inline
+SCORING_WORKERS = int(os.getenv("SCORING_WORKERS", str(os.cpu_count() or 1)))
+# Di bawah jumlah kandidat ini skoring dijalankan inline untuk menghindari overhead IPC
+SCORING_INLINE_THRESHOLD = int(os.getenv("SCORING_INLINE_THRESHOLD", "2000"))
+SCORING_CHUNK_SIZE = int(os.getenv("SCORING_CHUNK_SIZE", "5000"))
+# Batas total baris (kandidat + peluang) dalam patch yang ikut dikirim di setiap tugas; di atas ini
+# pool dibangun ulang dengan snapshot baru agar biaya IPC per tugas tetap kecil
+SCORING_PATCH_MAKS = int(os.getenv("SCORING_PATCH_MAKS", "500"))
+
+logger = logging.getLogger("alumni_ai.skoring")
+
+# Kolom yang diperiksa `cocok` untuk tiap jenis peluang, sama seperti di ambil_profil_alumni
+KOLOM_COCOK = {
+    "bisnis": ("dukungan", "kolaborasi", "butuh_sdm"),
+    "pekerja": ("skill", "deskripsi_skill", "dukungan"),
+    "irt": ("bidang_minat", "spesifik_bidang", "perlu_grup"),
+}
+
+
+def susun_teks_profil(skill_gabungan, aktivitas, pekerja=None, irt=None, bisnis=None) -> str:
+    """
+    Teks profil lengkap (huruf kecil) seperti yang dibangun cari_top_alumni_kolaborasi:
+    skill_gabungan ditambah detail dari tabel aktivitas yang tercantum di kolom aktivitas.
+    """
+    detail_parts = []
+    for act in [a.strip() for a in (aktivitas or "").split(',')]:
+        if act == "bekerja" and pekerja:
+            detail_parts.extend([pekerja.get('skill'), pekerja.get('deskripsi_skill'), pekerja.get('sertifikasi'), pekerja.get('dukungan')])
+        elif act == "ibu rumah tangga" and irt:
+            detail_parts.extend([irt.get('bidang_minat'), irt.get('spesifik_bidang'), irt.get('pengalaman_kelas'), irt.get('perlu_grup')])
+        elif act == "bisnis / freelance" and bisnis:
+            detail_parts.extend([bisnis.get('bidang_usaha'), bisnis.get('dukungan'), bisnis.get('kolaborasi'), bisnis.get('butuh_sdm'), bisnis.get('skill_praktikal')])
+    return " ".join(filter(None, [skill_gabungan or ""] + detail_parts)).strip().lower()
+
+
+def skor_teks(keywords, teks: str) -> int:
+    # Jumlah kata kunci yang muncul (substring) di teks profil
+    if not teks:
+        return 0
+    return sum(1 for keyword in keywords if keyword in teks)
+
+
+def top_k(kandidat, keywords, k: int, kecuali_id=None, offset: int = 0):
+    """
+    Mengembalikan hingga k pasangan (skor, posisi) terbaik dari list (id, teks).
+    Urutan seri mengikuti posisi scan, sama dengan sort stabil pada implementasi awal.
+    """
+    hasil = []
+    for i, (alumni_id, teks) in enumerate(kandidat):
+        if alumni_id == kecuali_id:
+            continue
+        skor = skor_teks(keywords, teks)
+        if skor > 0:
+            hasil.append((skor, offset + i))
+    return heapq.nsmallest(k, hasil, key=lambda x: (-x[0], x[1]))
+
+
+def tambah_top_k(heap, k: int, skor: int, urutan: int, buat_item):
+    """
+    Menyimpan hanya k entri terbaik di min-heap `heap`. Akar heap adalah entri terburuk (skor
+    terendah, lalu urutan scan paling akhir), sehingga seri tetap dimenangkan kandidat yang
+    lebih dulu di-scan. `buat_item` hanya dipanggil jika kandidat masuk top-k.
+    """
+    if len(heap) < k:
+        heapq.heappush(heap, (skor, -urutan, buat_item()))
+    elif (skor, -urutan) > heap[0][:2]:
+        heapq.heapreplace(heap, (skor, -urutan, buat_item()))
+
+
+def urutkan_top_k(heap):
+    # Skor tertinggi lebih dulu, seri sesuai urutan scan
+    return [(skor, item) for skor, _, item in sorted(heap, key=lambda e: (-e[0], -e[1]))]
+
+
+def cocok_peluang(skills, rows, kolom):
+    """
+    Indeks baris peluang yang salah satu kolomnya memuat salah satu skill (case-insensitive).
+    """
+    skills_lower = [s.lower() for s in skills]
+    cocok = []
+    for i, row in enumerate(rows):
+        for nama_kolom in kolom:
+            nilai = (row.get(nama_kolom) or "").lower()
+            if nilai and any(skill in nilai for skill in skills_lower):
+                cocok.append(i)
+                break
+    return cocok
+
+
+# --- Sisi worker ---
+
+_snapshot = {"versi": None, "kandidat": [], "peluang": {}, "pemilik": {}}
+
+
+def _init_worker(versi, kandidat, peluang, pemilik):
+    _snapshot.update(versi=versi, kandidat=kandidat, peluang=peluang, pemilik=pemilik)
+
+
+def _terapkan_patch(patch):
+    # Sama dengan IndeksProfil.diperbarui: posisi kandidat lama tetap, peluang milik alumni
+    # yang diganti dibuang lalu baris barunya ditambahkan di akhir
+    _, versi_baru, ganti, tambah, diganti, peluang_baru = patch
+    kandidat = _snapshot["kandidat"]
+    for posisi, item in ganti:
+        kandidat[posisi] = item
+    kandidat.extend(tambah)
+    for jenis, (rows, pemilik) in peluang_baru.items():
+        tetap = [(p, row) for p, row in zip(_snapshot["pemilik"][jenis], _snapshot["peluang"][jenis]) if p not in diganti]
+        _snapshot["peluang"][jenis] = [row for _, row in tetap] + rows
+        _snapshot["pemilik"][jenis] = [p for p, _ in tetap] + pemilik
+    _snapshot["versi"] = versi_baru
+
+
+def _sinkron(versi, patch) -> bool:
+    """Menerapkan patch yang belum dimiliki worker; True jika snapshot sudah di versi ini."""
+    for p in patch:
+        if _snapshot["versi"] == p[0]:
+            _terapkan_patch(p)
+    return _snapshot["versi"] == versi
+
+
+def _worker_top_k(versi, patch, mulai, akhir, keywords, k, kecuali_id):
+    if not _sinkron(versi, patch):
+        return None
+    return top_k(_snapshot["kandidat"][mulai:akhir], keywords, k, kecuali_id, offset=mulai)
+
+
+def _worker_cocok(versi, patch, jenis, skills):
+    if not _sinkron(versi, patch):
+        return None
+    return cocok_peluang(skills, _snapshot["peluang"][jenis], KOLOM_COCOK[jenis])
+
+
+# --- Sisi event loop ---
+
+_pool = None
+_pool_versi = None
+# Patch sejak snapshot pool dibuat, berurutan; ikut dikirim di setiap tugas
+_pool_patch = ()
+_tugas_pool = set()
+
+
+def _worker_siap():
+    return True
+
+
+def _buat_pool(indeks):
+    """
+    Membuat process pool untuk snapshot indeks dan menunggu semua worker siap. Blocking:
+    spawn worker dan pickle snapshot untuk tiap worker, jadi harus dijalankan di luar event loop.
+    """
+    pool = ProcessPoolExecutor(
+        max_workers=SCORING_WORKERS,
+        # spawn: fork dari proses yang menjalankan event loop dan thread lain tidak aman
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(indeks.versi, indeks.kandidat, indeks.peluang, indeks.peluang_pemilik),
+    )
+    # Worker dibuat saat tugas dikirim; kirim satu tugas per worker agar semuanya dibuat di sini
+    for f in [pool.submit(_worker_siap) for _ in range(SCORING_WORKERS)]:
+        f.result()
+    return pool
+
+
+def _ukuran_patch(patch) -> int:
+    _, _, ganti, tambah, _, peluang_baru = patch
+    return len(ganti) + len(tambah) + sum(len(rows) for rows, _ in peluang_baru.values())
+
+
+def _perlu_pool(indeks) -> bool:
+    total_peluang = sum(len(rows) for rows in indeks.peluang.values())
+    return SCORING_WORKERS > 0 and max(len(indeks.kandidat), total_peluang) >= SCORING_INLINE_THRESHOLD
+
+
+async def siapkan_pool(indeks):
+    """
+    Menyiapkan pool untuk versi indeks ini. Indeks hasil pembaruan inkremental yang kecil
+    cukup ditambahkan sebagai patch; selain itu pool baru dibangun di thread terpisah lalu
+    menggantikan pool lama. Pool lama dipensiunkan tanpa membatalkan tugas yang masih antre,
+    sehingga request yang sedang memakainya tetap selesai.
+    """
+    global _pool, _pool_versi, _pool_patch
+    if not _perlu_pool(indeks) or _pool_versi == indeks.versi:
+        return
+    patch = indeks.patch
+    if (_pool is not None and patch is not None and patch[0] == _pool_versi
+            and sum(map(_ukuran_patch, _pool_patch + (patch,))) <= SCORING_PATCH_MAKS):
+        _pool_patch, _pool_versi = _pool_patch + (patch,), indeks.versi
+        return
+    pool = await asyncio.to_thread(_buat_pool, indeks)
+    lama = _pool
+    _pool, _pool_versi, _pool_patch = pool, indeks.versi, ()
+    if lama is not None:
+        lama.shutdown(wait=False)
+
+
+def _dapatkan_pool(indeks):
+    # Pool tidak pernah dibuat di event loop; tanpa pool yang cocok, skoring berjalan di thread
+    return (_pool, _pool_patch) if _pool is not None and _pool_versi == indeks.versi else (None, ())
+
+
+def _pool_rusak(pool, indeks):
+    """
+    Melepas pool yang rusak (hanya jika masih pool aktif) dan membangun ulang di background.
+    """
+    global _pool, _pool_versi, _pool_patch
+    if _pool is not pool:
+        return
+    _pool, _pool_versi, _pool_patch = None, None, ()
+    pool.shutdown(wait=False)
+    tugas = asyncio.create_task(siapkan_pool(indeks))
+    _tugas_pool.add(tugas)
+    tugas.add_done_callback(_tugas_pool.discard)
+
+
+def tutup_pool():
+    global _pool, _pool_versi, _pool_patch
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+    _pool, _pool_versi, _pool_patch = None, None, ()
+
+
+async def top_k_async(indeks, keywords, k: int, kecuali_id=None):
+    """
+    Top-k kandidat dari indeks. Kandidat besar dipecah per chunk dan diskor paralel di
+    process pool, lalu hasil tiap chunk digabung dengan top-k lagi.
+    """
+    n = len(indeks.kandidat)
+    keywords = list(keywords)
+    if n < SCORING_INLINE_THRESHOLD:
+        return top_k(indeks.kandidat, keywords, k, kecuali_id)
+    pool, patch = _dapatkan_pool(indeks)
+    if pool is None:
+        return await asyncio.to_thread(top_k, indeks.kandidat, keywords, k, kecuali_id)
+
+    loop = asyncio.get_running_loop()
+    rentang = [(mulai, min(mulai + SCORING_CHUNK_SIZE, n)) for mulai in range(0, n, SCORING_CHUNK_SIZE)]
+    try:
+        hasil_chunk = await asyncio.gather(*[
+            loop.run_in_executor(pool, _worker_top_k, indeks.versi, patch, mulai, akhir, keywords, k, kecuali_id)
+            for mulai, akhir in rentang
+        ])
+    except BrokenProcessPool:
+        logger.exception("Process pool skoring rusak, fallback ke skoring di thread")
+        _pool_rusak(pool, indeks)
+        return await asyncio.to_thread(top_k, indeks.kandidat, keywords, k, kecuali_id)
+
+    gabungan = []
+    for (mulai, akhir), hasil in zip(rentang, hasil_chunk):
+        if hasil is None:
+            # Worker memegang snapshot versi lain; skor chunk ini di thread
+            hasil = await asyncio.to_thread(top_k, indeks.kandidat[mulai:akhir], keywords, k, kecuali_id, mulai)
+        gabungan.extend(hasil)
+    return heapq.nsmallest(k, gabungan, key=lambda x: (-x[0], x[1]))
+
+
+def _cocok_semua(indeks, skills, jenis_list):
+    return [cocok_peluang(skills, indeks.peluang[jenis], KOLOM_COCOK[jenis]) for jenis in jenis_list]
+
+
+async def cocok_peluang_async(indeks, skills):
+    """
+    Mengembalikan dict jenis -> list baris peluang yang cocok dengan skills.
+    """
+    total = sum(len(rows) for rows in indeks.peluang.values())
+    jenis_list = list(KOLOM_COCOK)
+    pool, patch = _dapatkan_pool(indeks) if total >= SCORING_INLINE_THRESHOLD else (None, ())
+    if total < SCORING_INLINE_THRESHOLD:
+        hasil = _cocok_semua(indeks, skills, jenis_list)
+    elif pool is None:
+        hasil = await asyncio.to_thread(_cocok_semua, indeks, skills, jenis_list)
+    else:
+        loop = asyncio.get_running_loop()
+        try:
+            hasil = await asyncio.gather(*[
+                loop.run_in_executor(pool, _worker_cocok, indeks.versi, patch, jenis, list(skills)) for jenis in jenis_list
+            ])
+        except BrokenProcessPool:
+            logger.exception("Process pool skoring rusak, fallback ke pencocokan di thread")
+            _pool_rusak(pool, indeks)
+            hasil = [None] * len(jenis_list)
+        if any(h is None for h in hasil):
+            cadangan = await asyncio.to_thread(_cocok_semua, indeks, skills, jenis_list)
+            hasil = [h if h is not None else c for h, c in zip(hasil, cadangan)]
+    return {jenis: [indeks.peluang[jenis][i] for i in idx] for jenis, idx in zip(jenis_list, hasil)}
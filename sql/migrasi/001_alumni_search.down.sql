@@ -0,0 +1,10 @@
+-- Membatalkan 001_alumni_search.sql
+DROP TRIGGER IF EXISTS alumni_search_sync ON alumni_db;
+DROP TRIGGER IF EXISTS alumni_search_sync ON alumni_pekerja;
+DROP TRIGGER IF EXISTS alumni_search_sync ON alumni_bisnis;
+DROP TRIGGER IF EXISTS alumni_search_sync ON alumni_rumah_tangga;
+DROP FUNCTION IF EXISTS alumni_search_trigger_alumni();
+DROP FUNCTION IF EXISTS alumni_search_trigger_detail();
+DROP FUNCTION IF EXISTS alumni_search_refresh(INTEGER);
+DROP FUNCTION IF EXISTS alumni_search_dokumen(INTEGER);
+DROP TABLE IF EXISTS alumni_search;
@@ -0,0 +1,84 @@
+-- Dokumen profil gabungan per alumni untuk pencarian kandidat di sisi database (SEARCH_MODE=db).
+-- Isi dokumen mengikuti teks profil yang dibangun di Python: skill_gabungan ditambah detail
+-- dari tabel aktivitas yang tercantum di kolom aktivitas, dalam huruf kecil.
+-- Konfigurasi 'simple' dipakai karena Postgres tidak punya stemmer bahasa Indonesia dan
+-- data bercampur Indonesia/Inggris.
+
+CREATE TABLE IF NOT EXISTS alumni_search (
+    alumni_id INTEGER PRIMARY KEY REFERENCES alumni_db(id) ON DELETE CASCADE,
+    dokumen TEXT NOT NULL DEFAULT '',
+    dokumen_tsv TSVECTOR GENERATED ALWAYS AS (to_tsvector('simple', dokumen)) STORED
+);
+
+CREATE INDEX IF NOT EXISTS alumni_search_dokumen_tsv_idx ON alumni_search USING GIN (dokumen_tsv);
+
+CREATE OR REPLACE FUNCTION alumni_search_dokumen(p_alumni_id INTEGER) RETURNS TEXT AS $$
+    -- Python memakai fetchrow (baris pertama) per tabel aktivitas, jadi di sini juga LIMIT 1
+    SELECT lower(trim(concat_ws(' ',
+        NULLIF(a.skill_gabungan, ''),
+        CASE WHEN 'bekerja' = ANY (akt.daftar) THEN NULLIF((
+            SELECT concat_ws(' ', NULLIF(p.skill, ''), NULLIF(p.deskripsi_skill, ''), NULLIF(p.sertifikasi, ''), NULLIF(p.dukungan, ''))
+            FROM alumni_pekerja p WHERE p.alumni_id = a.id LIMIT 1), '') END,
+        CASE WHEN 'ibu rumah tangga' = ANY (akt.daftar) THEN NULLIF((
+            SELECT concat_ws(' ', NULLIF(r.bidang_minat, ''), NULLIF(r.spesifik_bidang, ''), NULLIF(r.pengalaman_kelas, ''), NULLIF(r.perlu_grup, ''))
+            FROM alumni_rumah_tangga r WHERE r.alumni_id = a.id LIMIT 1), '') END,
+        CASE WHEN 'bisnis / freelance' = ANY (akt.daftar) THEN NULLIF((
+            SELECT concat_ws(' ', NULLIF(b.bidang_usaha, ''), NULLIF(b.dukungan, ''), NULLIF(b.kolaborasi, ''), NULLIF(b.butuh_sdm, ''), NULLIF(b.skill_praktikal, ''))
+            FROM alumni_bisnis b WHERE b.alumni_id = a.id LIMIT 1), '') END
+    )))
+    FROM alumni_db a,
+         LATERAL (SELECT array_agg(trim(x)) AS daftar FROM unnest(string_to_array(a.aktivitas, ',')) AS x) akt
+    WHERE a.id = p_alumni_id
+$$ LANGUAGE sql STABLE;
+
+CREATE OR REPLACE FUNCTION alumni_search_refresh(p_alumni_id INTEGER) RETURNS VOID AS $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM alumni_db WHERE id = p_alumni_id) THEN
+        RETURN;
+    END IF;
+    INSERT INTO alumni_search (alumni_id, dokumen)
+    VALUES (p_alumni_id, coalesce(alumni_search_dokumen(p_alumni_id), ''))
+    ON CONFLICT (alumni_id) DO UPDATE SET dokumen = EXCLUDED.dokumen;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Trigger: alumni_db memakai NEW.id, tabel detail memakai alumni_id lama dan baru
+CREATE OR REPLACE FUNCTION alumni_search_trigger_alumni() RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM alumni_search_refresh(NEW.id);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION alumni_search_trigger_detail() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM alumni_search_refresh(OLD.alumni_id);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND (TG_OP = 'INSERT' OR NEW.alumni_id IS DISTINCT FROM OLD.alumni_id) THEN
+        PERFORM alumni_search_refresh(NEW.alumni_id);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS alumni_search_sync ON alumni_db;
+CREATE TRIGGER alumni_search_sync AFTER INSERT OR UPDATE OF aktivitas, skill_gabungan ON alumni_db
+    FOR EACH ROW EXECUTE FUNCTION alumni_search_trigger_alumni();
+
+DROP TRIGGER IF EXISTS alumni_search_sync ON alumni_pekerja;
+CREATE TRIGGER alumni_search_sync AFTER INSERT OR UPDATE OR DELETE ON alumni_pekerja
+    FOR EACH ROW EXECUTE FUNCTION alumni_search_trigger_detail();
+
+DROP TRIGGER IF EXISTS alumni_search_sync ON alumni_bisnis;
+CREATE TRIGGER alumni_search_sync AFTER INSERT OR UPDATE OR DELETE ON alumni_bisnis
+    FOR EACH ROW EXECUTE FUNCTION alumni_search_trigger_detail();
+
+DROP TRIGGER IF EXISTS alumni_search_sync ON alumni_rumah_tangga;
+CREATE TRIGGER alumni_search_sync AFTER INSERT OR UPDATE OR DELETE ON alumni_rumah_tangga
+    FOR EACH ROW EXECUTE FUNCTION alumni_search_trigger_detail();
+
+-- Isi awal untuk data yang sudah ada
+INSERT INTO alumni_search (alumni_id, dokumen)
+SELECT id, coalesce(alumni_search_dokumen(id), '') FROM alumni_db
+ON CONFLICT (alumni_id) DO UPDATE SET dokumen = EXCLUDED.dokumen;
@@ -0,0 +1,7 @@
+-- Membatalkan 002_alumni_versi.sql
+DROP TRIGGER IF EXISTS alumni_versi_naik ON alumni_db;
+DROP TRIGGER IF EXISTS alumni_versi_naik ON alumni_pekerja;
+DROP TRIGGER IF EXISTS alumni_versi_naik ON alumni_bisnis;
+DROP TRIGGER IF EXISTS alumni_versi_naik ON alumni_rumah_tangga;
+DROP FUNCTION IF EXISTS alumni_versi_naik();
+DROP TABLE IF EXISTS alumni_versi;
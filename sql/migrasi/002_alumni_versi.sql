@@ -0,0 +1,34 @@
+-- Versi data alumni satu baris, dinaikkan trigger per statement setiap kali alumni_db atau tabel
+-- detail aktivitas berubah (termasuk COPY/impor massal dan TRUNCATE). Dipakai sebagai sumber
+-- ETag varian GET tanpa memuat seluruh tabel ke memori.
+
+CREATE TABLE IF NOT EXISTS alumni_versi (
+    id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+    versi BIGINT NOT NULL DEFAULT 1,
+    diubah TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+INSERT INTO alumni_versi (id) VALUES (TRUE) ON CONFLICT (id) DO NOTHING;
+
+CREATE OR REPLACE FUNCTION alumni_versi_naik() RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE alumni_versi SET versi = versi + 1, diubah = now();
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS alumni_versi_naik ON alumni_db;
+CREATE TRIGGER alumni_versi_naik AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON alumni_db
+    FOR EACH STATEMENT EXECUTE FUNCTION alumni_versi_naik();
+
+DROP TRIGGER IF EXISTS alumni_versi_naik ON alumni_pekerja;
+CREATE TRIGGER alumni_versi_naik AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON alumni_pekerja
+    FOR EACH STATEMENT EXECUTE FUNCTION alumni_versi_naik();
+
+DROP TRIGGER IF EXISTS alumni_versi_naik ON alumni_bisnis;
+CREATE TRIGGER alumni_versi_naik AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON alumni_bisnis
+    FOR EACH STATEMENT EXECUTE FUNCTION alumni_versi_naik();
+
+DROP TRIGGER IF EXISTS alumni_versi_naik ON alumni_rumah_tangga;
+CREATE TRIGGER alumni_versi_naik AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON alumni_rumah_tangga
+    FOR EACH STATEMENT EXECUTE FUNCTION alumni_versi_naik();
@@ -0,0 +1,40 @@
+-- Skema minimal tabel alumni untuk Postgres lokal (load test / pengembangan).
+-- Kolom mengikuti query yang dipakai di main.py.
+
+CREATE TABLE IF NOT EXISTS alumni_db (
+    id SERIAL PRIMARY KEY,
+    nama_lengkap TEXT NOT NULL,
+    nama_panggilan TEXT,
+    aktivitas TEXT NOT NULL DEFAULT '',
+    skill_gabungan TEXT
+);
+
+CREATE TABLE IF NOT EXISTS alumni_pekerja (
+    alumni_id INTEGER NOT NULL REFERENCES alumni_db(id) ON DELETE CASCADE,
+    skill TEXT,
+    deskripsi_skill TEXT,
+    sertifikasi TEXT,
+    dukungan TEXT
+);
+
+CREATE TABLE IF NOT EXISTS alumni_bisnis (
+    alumni_id INTEGER NOT NULL REFERENCES alumni_db(id) ON DELETE CASCADE,
+    nama_usaha TEXT,
+    bidang_usaha TEXT,
+    dukungan TEXT,
+    kolaborasi TEXT,
+    butuh_sdm TEXT,
+    skill_praktikal TEXT
+);
+
+CREATE TABLE IF NOT EXISTS alumni_rumah_tangga (
+    alumni_id INTEGER NOT NULL REFERENCES alumni_db(id) ON DELETE CASCADE,
+    bidang_minat TEXT,
+    spesifik_bidang TEXT,
+    pengalaman_kelas TEXT,
+    perlu_grup TEXT
+);
+
+CREATE INDEX IF NOT EXISTS alumni_pekerja_alumni_id_idx ON alumni_pekerja (alumni_id);
+CREATE INDEX IF NOT EXISTS alumni_bisnis_alumni_id_idx ON alumni_bisnis (alumni_id);
+CREATE INDEX IF NOT EXISTS alumni_rumah_tangga_alumni_id_idx ON alumni_rumah_tangga (alumni_id);
@@ -0,0 +1,42 @@
+"""
+Versi data alumni yang murah dibaca, untuk ETag varian GET tanpa memuat seluruh tabel.
+
+Tabel alumni_versi (migrasi 002) berisi satu baris yang dinaikkan trigger per statement setiap
+kali alumni_db atau tabel detail aktivitas berubah. Nilainya di-cache per proses selama
+DATA_VERSI_TTL detik.
+"""
+import os
+import time
+from dotenv import load_dotenv
+
+import db
+
+load_dotenv()
+# Lama versi di-cache; ETag bisa tertinggal dari perubahan data paling lama selama ini (0 = selalu query)
+DATA_VERSI_TTL = float(os.getenv("DATA_VERSI_TTL", "5"))
+
+_cache = {"versi": None, "dibaca": None}
+
+
+async def baca(conn):
+    """Nilai versi saat ini, atau None jika migrasi 002 belum diterapkan."""
+    if not await conn.fetchval("SELECT to_regclass('alumni_versi') IS NOT NULL"):
+        return None
+    return await conn.fetchval("SELECT versi FROM alumni_versi")
+
+
+async def dapatkan():
+    sekarang = time.monotonic()
+    if _cache["dibaca"] is None or sekarang - _cache["dibaca"] >= DATA_VERSI_TTL:
+        conn = await db.buka_koneksi()
+        try:
+            _cache["versi"] = await baca(conn)
+        finally:
+            await db.tutup_koneksi(conn)
+        _cache["dibaca"] = sekarang
+    return _cache["versi"]
+
+
+def lupakan():
+    # Dipanggil setelah proses ini sendiri mengubah data (misalnya impor) agar tidak menunggu TTL
+    _cache["dibaca"] = None